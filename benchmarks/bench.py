@@ -0,0 +1,218 @@
+"""
+Benchmark harness for para-pytest's own scheduling overhead.
+
+Generates synthetic test suites, runs them with plain pytest and with
+para-pytest, and reports the measurements as JSON. Pass --baseline with the
+output of a previous run to flag regressions.
+
+Usage:
+    python benchmarks/bench.py --sizes 1000,10000 --chunks 4,8 --output bench.json
+    python benchmarks/bench.py --baseline bench.json --threshold 0.10
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TESTS_PER_MODULE = 100
+
+# Profile name -> (duration distribution, heavy import cost in seconds, fraction of serial modules)
+PROFILES = {
+    'uniform': ('uniform', 0.0, 0.0),
+    'longtail': ('longtail', 0.0, 0.0),
+    'bimodal': ('bimodal', 0.0, 0.0),
+    'heavy-import': ('uniform', 0.5, 0.0),
+    'serial-mix': ('longtail', 0.0, 0.1),
+}
+
+# Metrics where a higher value is worse, checked against --baseline
+REGRESSION_METRICS = ['para_wall_time', 'collection_time', 'scheduling_overhead', 'parent_peak_memory_kb']
+
+
+def generate_durations(distribution: str, count: int, mean: float, rng: random.Random) -> List[float]:
+    """Draw per-test durations with the given mean"""
+    if distribution == 'uniform':
+        return [rng.uniform(0, 2 * mean) for _ in range(count)]
+    if distribution == 'longtail':
+        # Pareto with alpha=1.5 has mean 3, rescale to the requested mean
+        return [min(rng.paretovariate(1.5) * mean / 3, mean * 200) for _ in range(count)]
+    if distribution == 'bimodal':
+        return [mean * 8.2 if rng.random() < 0.1 else mean * 0.2 for _ in range(count)]
+    raise ValueError(f"Unknown distribution: {distribution}")
+
+
+def generate_suite(root: str, size: int, profile: str, mean: float, seed: int) -> float:
+    """Write a synthetic suite under root and return the sum of its test durations"""
+    distribution, import_cost, serial_fraction = PROFILES[profile]
+    rng = random.Random(seed)
+    durations = generate_durations(distribution, size, mean, rng)
+
+    tests_dir = os.path.join(root, 'tests')
+    os.makedirs(tests_dir)
+
+    with open(os.path.join(root, 'pyproject.toml'), 'w') as f:
+        f.write('[tool.pytest.ini_options]\n')
+        f.write('\n[tool.para-pytest]\n')
+        f.write('serial_patterns = ["**/test_serial_*"]\n')
+
+    if import_cost:
+        with open(os.path.join(tests_dir, 'heavy_dep.py'), 'w') as f:
+            f.write(f"import time\ntime.sleep({import_cost!r})\n")
+
+    module_count = (size + TESTS_PER_MODULE - 1) // TESTS_PER_MODULE
+    serial_modules = set(rng.sample(range(module_count), int(module_count * serial_fraction)))
+
+    for index in range(module_count):
+        module_durations = durations[index * TESTS_PER_MODULE:(index + 1) * TESTS_PER_MODULE]
+        prefix = 'test_serial' if index in serial_modules else 'test_bench'
+        with open(os.path.join(tests_dir, f"{prefix}_{index:05d}.py"), 'w') as f:
+            f.write("import time\nimport pytest\n")
+            if import_cost:
+                f.write("import heavy_dep\n")
+            f.write(f"\nDURATIONS = {[round(d, 6) for d in module_durations]!r}\n\n")
+            f.write("@pytest.mark.parametrize('index', range(len(DURATIONS)))\n")
+            f.write("def test_case(index):\n    time.sleep(DURATIONS[index])\n")
+
+    return sum(durations)
+
+
+def timed_run(cmd: List[str], cwd: str, env: Dict[str, str]) -> Dict:
+    """Run a command and return its wall time and the CPU time of it and its children"""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    completed = subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    cpu = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    return {'wall': wall, 'cpu': cpu, 'returncode': completed.returncode, 'stderr': completed.stderr}
+
+
+def run_case(size: int, profile: str, chunks: int, mean: float, seed: int, keep: bool) -> Dict:
+    """Generate one suite and measure plain pytest against para-pytest"""
+    root = tempfile.mkdtemp(prefix=f"para-pytest-bench-{profile}-{size}-")
+    cores = os.cpu_count() or 1
+    try:
+        test_time = generate_suite(root, size, profile, mean, seed)
+
+        env = os.environ.copy()
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [REPO_ROOT, env.get('PYTHONPATH')]))
+        env['COLUMNS'] = '9999'
+
+        collection = timed_run([sys.executable, '-m', 'pytest', '--collect-only', '-q', 'tests'], root, env)
+        plain = timed_run([sys.executable, '-m', 'pytest', '-q', '-p', 'no:cacheprovider', 'tests'], root, env)
+
+        # Run the runner through a small driver so it can report its own peak RSS
+        memory_file = os.path.join(root, 'peak_memory')
+        driver = (
+            "import atexit, resource, sys\n"
+            f"atexit.register(lambda: open({memory_file!r}, 'w').write("
+            "str(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)))\n"
+            f"sys.argv = ['para-pytest', '--chunks', '{chunks}', '--path', 'tests']\n"
+            "from para_pytest.runner import main\n"
+            "main()\n"
+        )
+        para = timed_run([sys.executable, '-c', driver], root, env)
+
+        peak_memory = None
+        if os.path.exists(memory_file):
+            with open(memory_file) as f:
+                peak_memory = int(f.read())
+
+        ideal = test_time / chunks
+        return {
+            'name': f"{profile}-{size}-chunks{chunks}",
+            'profile': profile,
+            'size': size,
+            'chunks': chunks,
+            'test_time': round(test_time, 4),
+            'pytest_wall_time': round(plain['wall'], 4),
+            'para_wall_time': round(para['wall'], 4),
+            'collection_time': round(collection['wall'], 4),
+            'scheduling_overhead': round(para['wall'] - collection['wall'] - ideal, 4),
+            'speedup': round(plain['wall'] / para['wall'], 4) if para['wall'] else None,
+            'parent_peak_memory_kb': peak_memory,
+            'core_utilization': round(para['cpu'] / (para['wall'] * cores), 4) if para['wall'] else None,
+            'para_returncode': para['returncode'],
+            'pytest_returncode': plain['returncode'],
+            'root': root if keep else None,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+def find_regressions(results: List[Dict], baseline: List[Dict], threshold: float) -> List[Dict]:
+    """Compare results with a previous run and return metrics that got worse by more than threshold"""
+    previous = {case['name']: case for case in baseline}
+    regressions = []
+
+    for case in results:
+        old = previous.get(case['name'])
+        if not old:
+            continue
+        for metric in REGRESSION_METRICS:
+            new_value, old_value = case.get(metric), old.get(metric)
+            if new_value is None or not old_value or old_value <= 0:
+                continue
+            change = (new_value - old_value) / old_value
+            if change > threshold:
+                regressions.append({
+                    'name': case['name'],
+                    'metric': metric,
+                    'baseline': old_value,
+                    'current': new_value,
+                    'change': round(change, 4),
+                })
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark para-pytest against plain pytest on synthetic suites")
+    parser.add_argument("--sizes", type=str, default="1000", help="Comma separated test counts (default: 1000)")
+    parser.add_argument("--profiles", type=str, default=",".join(PROFILES), help=f"Comma separated profiles (default: all of {', '.join(PROFILES)})")
+    parser.add_argument("--chunks", type=str, default="4", help="Comma separated chunk counts (default: 4)")
+    parser.add_argument("--mean-duration", type=float, default=0.001, help="Mean synthetic test duration in seconds (default: 0.001)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for generated durations (default: 0)")
+    parser.add_argument("--output", type=str, help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--baseline", type=str, help="Previous JSON results to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression (default: 0.10)")
+    parser.add_argument("--keep", action="store_true", help="Keep generated suites on disk")
+    args = parser.parse_args(argv)
+
+    results = []
+    for size in [int(s) for s in args.sizes.split(',')]:
+        for profile in args.profiles.split(','):
+            for chunks in [int(c) for c in args.chunks.split(',')]:
+                print(f"Running {profile} with {size} tests on {chunks} chunks...", file=sys.stderr)
+                results.append(run_case(size, profile, chunks, args.mean_duration, args.seed, args.keep))
+
+    output = {'cpu_count': os.cpu_count(), 'python': sys.version.split()[0], 'results': results}
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        output['regressions'] = find_regressions(results, baseline.get('results', []), args.threshold)
+
+    text = json.dumps(output, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    return 1 if output.get('regressions') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,14 @@
-from .runner import ParaPytestRunner
+from .reporting import Reporter, TerminalReporter
+from .results import RunResult, TestResult, WorkerResult
+from .shared import shared_value
 
 __version__ = "0.1.0"
-__all__ = ["ParaPytestRunner"]
\ No newline at end of file
+__all__ = ["ParaPytestRunner", "CollectionError", "Reporter", "TerminalReporter", "RunResult", "TestResult", "WorkerResult", "shared_value"]
+
+
+def __getattr__(name):
+    # Workers import para_pytest.plugin, which shouldn't pull in the runner and its imports
+    if name in ("ParaPytestRunner", "CollectionError"):
+        from . import runner
+        return getattr(runner, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,150 @@
+"""
+Test selection for --time-budget.
+
+Picks the tests that are most likely to find a problem and fit in the
+budget on the available workers, using the recorded durations and the
+outcome history (see para_pytest.history), and packs them into chunks by
+duration. Tests are taken in this order, each one only if it still fits:
+
+1. Tests that failed the last time they ran
+2. New tests, and tests in files changed since the last run
+3. Everything else, by failure rate per second of runtime, then shortest first
+
+Tests that don't make it are deferred and listed in
+``.pytest_cache/para-pytest/deferred.txt``.
+"""
+import heapq
+import os
+import tempfile
+from typing import Callable, Dict, List, Set, Tuple
+
+from .durations import CACHE_DIR, DEFAULT_WORKER_STARTUP, DurationStore
+from .history import DurationHistory
+from .watch import affected_test_files, is_test_file, scan_mtimes
+
+
+DEFERRED_PATH = os.path.join(CACHE_DIR, 'deferred.txt')
+
+# Share of the budget planned for tests, the rest absorbs duration noise and uneven chunks
+BUDGET_FILL = 0.9
+
+
+def changed_tests(tests: List[str], since: float, root: str = '.') -> Set[str]:
+    """Tests in files changed after since, or in test files named after changed source files"""
+    changed = [path for path, mtime in scan_mtimes(root).items() if mtime > since]
+    if not changed:
+        return set()
+    test_files = list(dict.fromkeys(test.split('::', 1)[0] for test in tests))
+    affected = affected_test_files(changed, test_files)
+    if affected is None:
+        # A conftest.py or source file without a matching test file, only changed test files are known to matter
+        affected = [os.path.relpath(path) for path in changed if is_test_file(path)]
+    affected = set(affected)
+    return {test for test in tests if test.split('::', 1)[0] in affected}
+
+
+def select_tests(
+    tests: List[str],
+    budget: float,
+    workers: int,
+    durations: DurationStore,
+    history: DurationHistory,
+    is_serial: Callable[[str], bool] = lambda test: False,
+    chunks: int = None,
+    io_workers: int = 0,
+    is_io: Callable[[str], bool] = lambda test: False,
+) -> Tuple[Dict[str, List[List[str]]], List[str], float]:
+    """
+    Pick the tests that fit and pack them into chunks by duration.
+
+    Returns (pool -> chunks, deferred, predicted seconds of test time), pools
+    being 'cpu', 'io' and 'serial'. Every chunk fits in its share of the
+    budget: workers run chunks / workers of them one after another (the
+    serial chunk takes a worker slot too), each paying the worker startup
+    cost, while I/O bound tests get one chunk per I/O worker. Tests are
+    added in priority order to the least loaded chunk of their pool, then the
+    chunks are repacked longest test first if that balances them better.
+    Chunks keep the collection order.
+    """
+    startup = durations.worker_startup if durations.worker_startup is not None else DEFAULT_WORKER_STARTUP
+    chunks = chunks or workers
+    io_workers = io_workers if any(is_io(test) for test in tests) else 0
+    serial = any(is_serial(test) for test in tests)
+    runs_per_slot = -(-(chunks + serial) // workers)
+    per_chunk = max(0.0, budget * BUDGET_FILL / runs_per_slot - startup)
+    per_io_chunk = max(0.0, budget * BUDGET_FILL - startup)
+    pools = {
+        'cpu': _Pool(chunks, per_chunk),
+        'io': _Pool(io_workers, per_io_chunk),
+        'serial': _Pool(1 if serial else 0, per_chunk),
+    }
+
+    def pool_of(test: str) -> str:
+        if is_serial(test):
+            return 'serial'
+        return 'io' if io_workers and is_io(test) else 'cpu'
+
+    known = sorted(durations.total(test) for test in tests if test in durations)
+    default = known[len(known) // 2] if known else 0.0
+    changed = changed_tests(tests, history.time) if history.time is not None else set()
+
+    def duration(test: str) -> float:
+        return durations.total(test, default)
+
+    def priority(test: str):
+        if history.failed_last(test):
+            return (0, duration(test))
+        if test not in durations or test in changed:
+            return (1, duration(test))
+        return (2, -history.failure_rate(test) / max(duration(test), 1e-3), duration(test))
+
+    used = 0.0
+    for test in sorted(tests, key=priority):
+        if pools[pool_of(test)].add(test, duration(test)):
+            used += duration(test)
+
+    positions = {test: position for position, test in enumerate(tests)}
+    packed = {name: [sorted(chunk, key=positions.get) for chunk in pool.balanced(duration) if chunk] for name, pool in pools.items()}
+    chosen = {test for pool_chunks in packed.values() for chunk in pool_chunks for test in chunk}
+    deferred = [test for test in tests if test not in chosen]
+    return packed, deferred, used
+
+
+class _Pool:
+    """Chunks of one worker pool being filled up to a capacity each"""
+
+    def __init__(self, count: int, capacity: float):
+        self.capacity = capacity
+        self.loads = [(0.0, index) for index in range(count)]
+        self.chunks: List[List[str]] = [[] for _ in range(count)]
+
+    def add(self, test: str, duration: float) -> bool:
+        """Put the test in the least loaded chunk if it fits there"""
+        if not self.loads or self.loads[0][0] + duration > self.capacity:
+            return False
+        load, index = self.loads[0]
+        heapq.heapreplace(self.loads, (load + duration, index))
+        self.chunks[index].append(test)
+        return True
+
+    def balanced(self, duration: Callable[[str], float]) -> List[List[str]]:
+        """The chunks, or the same tests repacked longest first if that lowers the longest chunk"""
+        tests = sorted((test for chunk in self.chunks for test in chunk), key=lambda test: -duration(test))
+        loads = [(0.0, index) for index in range(len(self.chunks))]
+        chunks: List[List[str]] = [[] for _ in self.chunks]
+        for test in tests:
+            load, index = loads[0]
+            heapq.heapreplace(loads, (load + duration(test), index))
+            chunks[index].append(test)
+        current = max((load for load, _ in self.loads), default=0.0)
+        repacked = max((load for load, _ in loads), default=0.0)
+        return chunks if repacked < current else self.chunks
+
+
+def write_deferred(deferred: List[str], path: str = DEFERRED_PATH):
+    """One node ID per line, so the deferred tests can be run with pytest $(cat path)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.writelines(f"{test}\n" for test in deferred)
+    os.replace(temp_path, path)
@@ -0,0 +1,107 @@
+"""
+Coverage measurement across workers for --cov.
+
+Every worker measures into its own data file, see the --para-cov-data plugin
+option. The parent combines them in groups, one process per group, then
+merges the group results into the final data file and writes the reports.
+Requires the optional coverage package: ``pip install 'para-pytest[cov]'``.
+"""
+import asyncio
+import glob
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+try:
+    import coverage
+except ImportError:
+    coverage = None
+
+
+REPORTS = ['term', 'term-missing', 'html', 'xml', 'json']
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Fewest data files per combining process, smaller sets are combined in one go
+FILES_PER_PROCESS = 4
+
+
+def require_coverage():
+    if coverage is None:
+        raise ImportError("--cov requires the coverage package: pip install 'para-pytest[cov]'")
+
+
+def start(data_file: str, sources: Optional[List[str]]):
+    """
+    Start measuring in a worker, stop and save the returned Coverage when done.
+
+    para-pytest's own modules are omitted, e.g. with an editable install,
+    unless a source names them.
+    """
+    require_coverage()
+    cov = coverage.Coverage(data_file=data_file, source=sources or None, config_file=True)
+    if not any('para_pytest' in source for source in sources or []):
+        cov.set_option('run:omit', list(cov.get_option('run:omit') or []) + [os.path.join(PACKAGE_DIR, '*')])
+    cov.start()
+    return cov
+
+
+def _combine(data_file: str, files: List[str]) -> str:
+    cov = coverage.Coverage(data_file=data_file, config_file=True)
+    cov.combine(data_paths=files, keep=False)
+    cov.save()
+    return data_file
+
+
+async def combine(directory: str, data_file: str, processes: int) -> int:
+    """
+    Combine all data files in directory into data_file and return how many there were.
+
+    Groups of files are combined in parallel processes first, so the final,
+    serial step only merges one file per process.
+    """
+    files = sorted(glob.glob(os.path.join(directory, '.coverage*')))
+    if not files:
+        return 0
+
+    processes = max(1, min(processes, len(files) // FILES_PER_PROCESS))
+    loop = asyncio.get_running_loop()
+    if processes > 1:
+        groups = [files[i::processes] for i in range(processes)]
+        with ProcessPoolExecutor(processes) as executor:
+            combined = await asyncio.gather(*[
+                loop.run_in_executor(executor, _combine, os.path.join(directory, f".combined.{i}"), group)
+                for i, group in enumerate(groups)
+            ])
+    else:
+        combined = files
+
+    if os.path.exists(data_file):
+        os.unlink(data_file)
+    await loop.run_in_executor(None, _combine, data_file, list(combined))
+    return len(files)
+
+
+def report(data_file: str, reports: List[str]) -> Tuple[Optional[float], List[str]]:
+    """Write the requested reports, return the total percentage and lines to show"""
+    cov = coverage.Coverage(data_file=data_file, config_file=True)
+    cov.load()
+
+    total = None
+    lines = []
+    for kind in reports:
+        if kind in ('term', 'term-missing'):
+            output = io.StringIO()
+            total = cov.report(file=output, show_missing=kind == 'term-missing')
+            lines.append(output.getvalue().rstrip('\n'))
+        elif kind == 'html':
+            total = cov.html_report()
+            lines.append(f"Coverage HTML written to dir {cov.config.html_dir}")
+        elif kind == 'xml':
+            total = cov.xml_report()
+            lines.append(f"Coverage XML written to file {cov.config.xml_output}")
+        elif kind == 'json':
+            total = cov.json_report()
+            lines.append(f"Coverage JSON written to file {cov.config.json_output}")
+    return total, lines
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+from typing import Dict, List, Optional
+
+from .results import ResultAggregator
+
+
+CACHE_DIR = os.path.join('.pytest_cache', 'para-pytest')
+
+# Weight of the latest run in the recorded worker startup cost
+STARTUP_SMOOTHING = 0.5
+
+# Used until a run has measured the worker startup cost
+DEFAULT_WORKER_STARTUP = 0.5
+
+
+class DurationStore:
+    """Per-test phase durations and CPU time recorded by previous runs"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(CACHE_DIR, 'durations.json')
+        # nodeid -> [setup, call, teardown, cpu]
+        self.durations: Dict[str, List[float]] = {}
+        # Entries recorded since loading, merged into the file on save
+        self.updated: Dict[str, List[float]] = {}
+        # Seconds a worker spends outside of tests: interpreter start, collection, exit
+        self.worker_startup: Optional[float] = None
+
+    @property
+    def workers_path(self) -> str:
+        return os.path.join(os.path.dirname(self.path), 'workers.json')
+
+    def _read(self) -> Dict[str, List[float]]:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except (OSError, ValueError):
+                pass
+        return {}
+
+    def load(self) -> 'DurationStore':
+        self.durations = self._read()
+        if os.path.exists(self.workers_path):
+            try:
+                with open(self.workers_path, 'r') as f:
+                    self.worker_startup = json.load(f).get('startup')
+            except (OSError, ValueError, AttributeError):
+                self.worker_startup = None
+        return self
+
+    def save(self):
+        """
+        Merge the entries recorded since loading into the file.
+
+        The file is re-read first, so runners of other suites that saved in
+        the meantime keep their entries.
+        """
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.durations = self._read()
+        self.durations.update(self.updated)
+        self.updated = {}
+        write_json(self.path, self.durations)
+        if self.worker_startup is not None:
+            write_json(self.workers_path, {'startup': round(self.worker_startup, 6)})
+
+    def update(self, results: ResultAggregator):
+        """Record the phase durations and CPU time of every executed test"""
+        for position, nodeid in enumerate(results.collected_tests):
+            if results.outcomes[position]:
+                self.durations[nodeid] = self.updated[nodeid] = [
+                    round(results.setup[position], 6),
+                    round(results.call[position], 6),
+                    round(results.teardown[position], 6),
+                    round(results.cpu[position], 6),
+                ]
+
+    def update_startup(self, startup: float):
+        """Blend the worker startup cost measured in a run into the recorded one"""
+        if self.worker_startup is None:
+            self.worker_startup = startup
+        else:
+            self.worker_startup += STARTUP_SMOOTHING * (startup - self.worker_startup)
+
+    def __bool__(self) -> bool:
+        return bool(self.durations)
+
+    def __contains__(self, nodeid: str) -> bool:
+        return nodeid in self.durations
+
+    def total(self, nodeid: str, default: float = 0.0) -> float:
+        """Recorded wall time of a test across all phases"""
+        phases = self.durations.get(nodeid)
+        return sum(phases[:3]) if phases else default
+
+    def setup(self, nodeid: str) -> float:
+        """Recorded setup time of a test, which includes any fixtures it set up first"""
+        phases = self.durations.get(nodeid)
+        return phases[0] if phases else 0.0
+
+    def cpu_ratio(self, nodeid: str) -> Optional[float]:
+        """Recorded CPU time over wall time of a test, None if unknown"""
+        phases = self.durations.get(nodeid)
+        if not phases or len(phases) < 4 or sum(phases[:3]) <= 0:
+            return None
+        return phases[3] / sum(phases[:3])
+
+
+def write_json(path: str, data):
+    """Replace path atomically, through a temp file of its own so concurrent runs don't collide"""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=f".{os.path.basename(path)}.", suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(temp_path, path)
@@ -0,0 +1,212 @@
+"""
+Per-test duration history and ``para-pytest slow-report``.
+
+Every run appends the outcome of each executed test, and the duration of
+each passed one, to rings of the last HISTORY_SIZE runs of that test, stored
+in ``.pytest_cache/para-pytest/history.json``. Only complete runs count as
+runs: ``--watch`` re-runs and ``--time-budget`` subsets add to the rings but
+don't advance the run counter, so tests they skipped are still part of the
+latest run. Tests not seen for HISTORY_SIZE complete runs are dropped. The report compares the median of the latest runs with the
+median of the runs before them, and lists the tests that take most of the
+suite's time.
+"""
+import argparse
+import json
+import os
+import time
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+
+from .durations import CACHE_DIR, write_json
+from .results import OUTCOME_CODES, ResultAggregator
+
+
+# Durations kept per test
+HISTORY_SIZE = 20
+
+# Latest runs compared against the ones before them
+RECENT_RUNS = 3
+
+# Fewest earlier runs needed to judge a regression
+BASELINE_RUNS = 3
+
+HISTORY_VERSION = 1
+
+PASSED = ord(OUTCOME_CODES['passed'])
+FAILED = {OUTCOME_CODES['failed'], OUTCOME_CODES['error']}
+
+
+class DurationHistory:
+    """Ring of recent durations per test, fed by every run"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(CACHE_DIR, 'history.json')
+        # Number of complete runs recorded so far
+        self.runs = 0
+        # When the last run was recorded, complete or not
+        self.time: Optional[float] = None
+        # nodeid -> [last run that executed it, oldest duration, ..., newest duration]
+        self.tests: Dict[str, List[float]] = {}
+        # nodeid -> outcome codes of its recent runs, oldest first
+        self.outcomes: Dict[str, str] = {}
+
+    def load(self) -> 'DurationHistory':
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == HISTORY_VERSION:
+                    self.runs = data['runs']
+                    self.time = data.get('time')
+                    self.tests = data['tests']
+                    self.outcomes = data.get('outcomes', {})
+            except (OSError, ValueError, KeyError, AttributeError):
+                self.runs = 0
+                self.time = None
+                self.tests = {}
+                self.outcomes = {}
+        return self
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        write_json(self.path, {'version': HISTORY_VERSION, 'runs': self.runs, 'time': self.time, 'tests': self.tests, 'outcomes': self.outcomes})
+
+    def record(self, results: ResultAggregator, complete: bool = True):
+        """
+        Append the outcome of every executed test and the duration of every
+        passed one, failures and skips vary with where they stop.
+
+        A run of only some of the tests (complete=False) is recorded as part
+        of the latest complete run and doesn't prune tests it didn't run.
+        """
+        self.time = time.time()
+        if complete:
+            self.runs += 1
+        for position, nodeid in enumerate(results.collected_tests):
+            code = results.outcomes[position]
+            if not code:
+                continue
+            self.outcomes[nodeid] = (self.outcomes.get(nodeid, '') + chr(code))[-HISTORY_SIZE:]
+            entry = self.tests.setdefault(nodeid, [self.runs])
+            entry[0] = self.runs
+            if code == PASSED:
+                entry.append(round(results.setup[position] + results.call[position] + results.teardown[position], 4))
+                if len(entry) > HISTORY_SIZE + 1:
+                    del entry[1:len(entry) - HISTORY_SIZE]
+
+        if not complete:
+            return
+
+        # Deleted and renamed tests
+        for nodeid in [nodeid for nodeid, entry in self.tests.items() if entry[0] <= self.runs - HISTORY_SIZE]:
+            del self.tests[nodeid]
+            self.outcomes.pop(nodeid, None)
+
+    def durations(self, nodeid: str) -> List[float]:
+        """Recorded durations of a test, oldest first"""
+        entry = self.tests.get(nodeid)
+        return entry[1:] if entry else []
+
+    def failed_last(self, nodeid: str) -> bool:
+        """Whether the test failed the last time it ran"""
+        return self.outcomes.get(nodeid, '')[-1:] in FAILED
+
+    def failure_rate(self, nodeid: str) -> float:
+        """Fraction of its recorded runs in which the test failed"""
+        outcomes = self.outcomes.get(nodeid)
+        if not outcomes:
+            return 0.0
+        return sum(1 for code in outcomes if code in FAILED) / len(outcomes)
+
+    def regressions(self, threshold: float, min_delta: float) -> List[Tuple[str, float, float]]:
+        """
+        (nodeid, baseline median, recent median) of tests that got slower.
+
+        A test regressed when the median of its last RECENT_RUNS durations is
+        more than threshold (a fraction) and min_delta seconds above the
+        median of its earlier ones.
+        """
+        regressed = []
+        for nodeid in self.tests:
+            durations = self.durations(nodeid)
+            if len(durations) < RECENT_RUNS + BASELINE_RUNS:
+                continue
+            baseline = median(durations[:-RECENT_RUNS])
+            recent = median(durations[-RECENT_RUNS:])
+            if recent - baseline > min_delta and recent > baseline * (1 + threshold):
+                regressed.append((nodeid, baseline, recent))
+        return sorted(regressed, key=lambda item: item[1] - item[2])
+
+    def contributors(self) -> List[Tuple[str, float]]:
+        """(nodeid, recent median) of tests still in the suite, slowest first"""
+        current = [
+            (nodeid, median(self.durations(nodeid)[-RECENT_RUNS:]))
+            for nodeid, entry in self.tests.items() if entry[0] == self.runs and len(entry) > 1
+        ]
+        return sorted(current, key=lambda item: -item[1])
+
+
+def print_report(history: DurationHistory, regressions: List[Tuple[str, float, float]], top: int):
+    bold = '\033[1m'
+    red = '\033[31m'
+    green = '\033[32m'
+    reset = '\033[0m'
+
+    contributors = history.contributors()
+    total = sum(duration for _, duration in contributors)
+    print(f"\n{history.runs} runs recorded, {len(contributors)} tests in the latest one, {total:.2f}s of test time")
+
+    if regressions:
+        print(f"\n{bold}{red}{len(regressions)} tests got slower:{reset}")
+        for nodeid, baseline, recent in regressions[:top]:
+            print(f"  {baseline:8.3f}s -> {recent:8.3f}s  {red}+{(recent / baseline - 1) * 100 if baseline else float('inf'):.0f}%{reset}  {nodeid}")
+        if len(regressions) > top:
+            print(f"  ... and {len(regressions) - top} more")
+    else:
+        print(f"\n{green}No tests got slower{reset}")
+
+    if contributors:
+        print(f"\n{bold}Slowest tests:{reset}")
+        for nodeid, duration in contributors[:top]:
+            print(f"  {duration:8.3f}s {duration / total * 100 if total else 0:5.1f}%  {nodeid}")
+
+        files: Dict[str, float] = {}
+        for nodeid, duration in contributors:
+            path = nodeid.split('::', 1)[0]
+            files[path] = files.get(path, 0.0) + duration
+        print(f"\n{bold}Slowest files:{reset}")
+        for path, duration in sorted(files.items(), key=lambda item: -item[1])[:top]:
+            print(f"  {duration:8.3f}s {duration / total * 100 if total else 0:5.1f}%  {path}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="para-pytest slow-report",
+        description="Show tests whose duration regressed over recent runs and the tests that take most of the suite's time"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=20.0,
+        metavar="PERCENT",
+        help=f"Flag tests whose median over the last {RECENT_RUNS} runs is this much above their earlier median (default: 20)"
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=0.05,
+        metavar="SECONDS",
+        help="Ignore regressions smaller than this, to skip noise in fast tests (default: 0.05)"
+    )
+    parser.add_argument("--top", type=int, default=10, help="Tests and files to list per section (default: 10)")
+    parser.add_argument("--strict", action="store_true", help="Exit with status 1 when tests got slower")
+    args = parser.parse_args(argv)
+
+    history = DurationHistory().load()
+    if not history.tests:
+        print("No duration history yet, run para-pytest to record it")
+        return 0
+
+    regressions = history.regressions(args.threshold / 100, args.min_delta)
+    print_report(history, regressions, args.top)
+    return 1 if args.strict and regressions else 0
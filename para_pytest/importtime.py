@@ -0,0 +1,142 @@
+"""
+Import time profile of worker startup for --profile-startup.
+
+Workers run with PYTHONPROFILEIMPORTTIME=1 (``-X importtime``) and their
+stderr in a separate file, and with ``--capture=sys`` so conftest.py and test
+module imports still reach it. The parent parses each worker's import tree
+and merges them: a module imported by several workers is shown once, with its
+time averaged over the profiled workers.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+IMPORT_PREFIX = 'import time:'
+
+# Modules below this share of the import time are left out of the tree
+TREE_MIN_SHARE = 0.01
+
+
+class ImportNode:
+    """A module import with the time spent in its own body and including its imports, in microseconds"""
+
+    __slots__ = ('name', 'self_us', 'cumulative_us', 'workers', 'children')
+
+    def __init__(self, name: str, self_us: int = 0, cumulative_us: int = 0):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        # Profiled workers that imported it, for merged trees
+        self.workers = 1
+        self.children: Dict[str, 'ImportNode'] = {}
+
+
+def parse(lines: Iterable[str]) -> List[ImportNode]:
+    """
+    Top level imports of ``-X importtime`` output.
+
+    Nested imports are printed before the import that triggered them, two
+    spaces further indented, so children are collected until their parent
+    shows up one level up.
+    """
+    pending: Dict[int, List[ImportNode]] = {}
+    for line in lines:
+        if not line.startswith(IMPORT_PREFIX):
+            continue
+        fields = line[len(IMPORT_PREFIX):].split('|', 2)
+        if len(fields) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(fields[0]), int(fields[1])
+        except ValueError:
+            # Header line
+            continue
+        name = fields[2].rstrip('\n')
+        level = (len(name) - len(name.lstrip(' '))) // 2
+        node = ImportNode(name.strip(), self_us, cumulative_us)
+        for child in pending.pop(level + 1, []):
+            node.children[child.name] = child
+        pending.setdefault(level, []).append(node)
+    return pending[min(pending)] if pending else []
+
+
+class StartupProfile:
+    """Import trees of all profiled workers, merged by import path"""
+
+    def __init__(self):
+        self.roots: Dict[str, ImportNode] = {}
+        # (worker, import seconds, worker wall time, test time)
+        self.workers: List[Tuple[str, float, float, float]] = []
+
+    def add(self, worker: str, roots: List[ImportNode], duration: float, test_time: float):
+        imports = sum(root.cumulative_us for root in roots) / 1e6
+        self.workers.append((worker, imports, duration, test_time))
+        self._merge(self.roots, roots)
+
+    def _merge(self, merged: Dict[str, ImportNode], nodes: Iterable[ImportNode]):
+        for node in nodes:
+            target = merged.get(node.name)
+            if target is None:
+                target = merged[node.name] = ImportNode(node.name)
+                target.workers = 0
+            target.self_us += node.self_us
+            target.cumulative_us += node.cumulative_us
+            target.workers += 1
+            self._merge(target.children, node.children.values())
+
+    def modules(self) -> Dict[str, ImportNode]:
+        """Every module once, with its times summed over the workers, wherever it was imported from"""
+        flat: Dict[str, ImportNode] = {}
+        stack = list(self.roots.values())
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children.values())
+            total = flat.get(node.name)
+            if total is None:
+                total = flat[node.name] = ImportNode(node.name)
+                total.workers = 0
+            total.self_us += node.self_us
+            total.cumulative_us += node.cumulative_us
+            total.workers += node.workers
+        return flat
+
+    def report(self, top: int = 15) -> List[str]:
+        if not self.workers:
+            return ["No import times were recorded"]
+        count = len(self.workers)
+
+        def ms(us: float) -> str:
+            return f"{us / count / 1000:8.1f}ms"
+
+        total_us = sum(root.cumulative_us for root in self.roots.values())
+        lines = [f"\nImport time per worker, averaged over {count} workers: {total_us / count / 1e6:.2f}s"]
+
+        lines.append("\nSlowest imports (self time, cumulative, workers that imported it):")
+        modules = sorted(self.modules().values(), key=lambda node: -node.self_us)
+        for node in modules[:top]:
+            lines.append(f"  {ms(node.self_us)} {ms(node.cumulative_us)}  {node.workers:>3}/{count}  {node.name}")
+
+        lines.append(f"\nImport tree (cumulative, imports over {TREE_MIN_SHARE:.0%} of the total):")
+        self._tree_lines(lines, self.roots, total_us * TREE_MIN_SHARE, ms, 1, top)
+
+        lines.append("\nStartup per worker:")
+        lines.append(f"  {'worker':<12} {'wall':>8} {'tests':>8} {'startup':>8} {'imports':>8}")
+        for worker, imports, duration, test_time in self.workers:
+            startup = max(0.0, duration - test_time)
+            lines.append(f"  {worker:<12} {duration:7.2f}s {test_time:7.2f}s {startup:7.2f}s {imports:7.2f}s")
+        return lines
+
+    def _tree_lines(self, lines: List[str], nodes: Dict[str, ImportNode], minimum: float, ms, depth: int, top: int):
+        for node in sorted(nodes.values(), key=lambda node: -node.cumulative_us)[:top]:
+            if node.cumulative_us < minimum:
+                break
+            lines.append(f"  {ms(node.cumulative_us)}  {'  ' * (depth - 1)}{node.name}")
+            self._tree_lines(lines, node.children, minimum, ms, depth + 1, top)
+
+
+def split_output(text: str) -> Tuple[List[str], Optional[str]]:
+    """Import time lines of a worker's stderr, and whatever else it wrote there"""
+    imports = []
+    other = []
+    for line in text.splitlines(keepends=True):
+        (imports if line.startswith(IMPORT_PREFIX) else other).append(line)
+    return imports, ''.join(other) or None
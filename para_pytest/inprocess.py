@@ -0,0 +1,212 @@
+"""
+Experimental in-process worker backends.
+
+Instead of starting a ``pytest`` subprocess per chunk, a chunk runs through
+``pytest.main`` inside the parent process:
+
+- ``thread``: in a thread, on free-threaded CPython builds (3.13t) where
+  threads run in parallel. Imported modules are shared between the chunks.
+- ``interpreter``: in an isolated subinterpreter with its own GIL (3.12+).
+  Each subinterpreter imports its own modules, but skips interpreter startup.
+
+Both write their output to the chunk's log file like a subprocess would. Test
+output is not captured per test in thread mode, so failure text has no
+"Captured stdout" sections there.
+"""
+import json
+import os
+import sys
+import threading
+from typing import List
+
+
+BACKENDS = ['subprocess', 'thread', 'interpreter', 'auto']
+
+# Plugins that act on process wide state and can't run in several sessions at once
+IN_PROCESS_ARGS = ['-p', 'no:faulthandler']
+# Threads also share sys.stdout and the warnings filters
+THREAD_ARGS = ['--capture=no', '-p', 'no:warnings']
+
+INTERPRETER_SCRIPT = """\
+import json, os, sys
+sys.path[:] = json.loads(path_json)
+from para_pytest.inprocess import CappedLog
+with CappedLog(log_path, log_size_limit) as log:
+    sys.stdout = sys.stderr = log
+    import pytest
+    code = int(pytest.main(json.loads(args_json)))
+os.write(result_fd, str(code).encode())
+"""
+
+
+def free_threaded() -> bool:
+    """Whether this interpreter runs threads without the GIL"""
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def subinterpreters():
+    """The low level subinterpreter module, None before 3.12 where interpreters share the GIL"""
+    if sys.version_info < (3, 12):
+        return None
+    for name in ('_interpreters', '_xxsubinterpreters'):
+        try:
+            return __import__(name)
+        except ImportError:
+            continue
+    return None
+
+
+def available_backend(requested: str) -> str:
+    """The backend to use for a requested one, falling back to subprocess"""
+    if requested == 'auto':
+        if free_threaded():
+            return 'thread'
+        if subinterpreters() is not None:
+            return 'interpreter'
+        return 'subprocess'
+    if requested == 'thread' and not free_threaded():
+        return 'subprocess'
+    if requested == 'interpreter' and subinterpreters() is None:
+        return 'subprocess'
+    return requested
+
+
+class CappedLog:
+    """Text log file that stops writing after limit bytes, like the subprocess log spill"""
+
+    encoding = 'utf-8'
+
+    def __init__(self, path: str, limit: int):
+        self.file = open(path, 'w', encoding='utf-8', errors='replace')
+        self.limit = limit
+        self.written = 0
+        self.dropped = 0
+
+    def write(self, text: str) -> int:
+        size = len(text.encode('utf-8', 'replace'))
+        if self.written + size <= self.limit:
+            self.file.write(text)
+            self.written += size
+        else:
+            self.dropped += size
+        return len(text)
+
+    def flush(self):
+        self.file.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    def close(self):
+        if self.dropped:
+            self.file.write(f"\n[para-pytest] {self.dropped} more bytes of output not logged\n")
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ThreadOutput:
+    """
+    Stand-in for sys.stdout and sys.stderr that sends the output of each
+    worker thread to its own log and everything else to the original stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.logs = {}
+
+    def _target(self):
+        return self.logs.get(threading.get_ident(), self.stream)
+
+    def write(self, text: str) -> int:
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self) -> bool:
+        return self._target().isatty()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+_output_lock = threading.Lock()
+_output_users = 0
+
+
+def _install_output():
+    global _output_users
+    with _output_lock:
+        if _output_users == 0:
+            sys.stdout = ThreadOutput(sys.stdout)
+            sys.stderr = ThreadOutput(sys.stderr)
+        _output_users += 1
+
+
+def _uninstall_output():
+    global _output_users
+    with _output_lock:
+        _output_users -= 1
+        if _output_users == 0:
+            sys.stdout = sys.stdout.stream
+            sys.stderr = sys.stderr.stream
+
+
+def run_in_thread(args: List[str], log_path: str, log_size_limit: int) -> int:
+    """Run pytest with args in the calling thread and return its exit code"""
+    import pytest
+
+    _install_output()
+    ident = threading.get_ident()
+    with CappedLog(log_path, log_size_limit) as log:
+        sys.stdout.logs[ident] = sys.stderr.logs[ident] = log
+        try:
+            return int(pytest.main(THREAD_ARGS + IN_PROCESS_ARGS + args))
+        except Exception as e:
+            log.write(f"[para-pytest] in-process worker failed: {e!r}\n")
+            return 3
+        finally:
+            del sys.stdout.logs[ident], sys.stderr.logs[ident]
+            _uninstall_output()
+
+
+def run_in_interpreter(args: List[str], log_path: str, log_size_limit: int) -> int:
+    """
+    Run pytest with args in a new subinterpreter and return its exit code,
+    3 (internal error) when the subinterpreter failed before pytest returned.
+    """
+    interpreters = subinterpreters()
+    interpreter = interpreters.create()
+    read_fd, write_fd = os.pipe()
+    try:
+        shared = {
+            'path_json': json.dumps(sys.path),
+            'args_json': json.dumps(['--capture=sys'] + IN_PROCESS_ARGS + args),
+            'log_path': log_path,
+            'log_size_limit': log_size_limit,
+            'result_fd': write_fd,
+        }
+        try:
+            # 3.13 returns the error, 3.12 raises it
+            error = interpreters.run_string(interpreter, INTERPRETER_SCRIPT, shared)
+        except Exception as e:
+            error = e
+        os.close(write_fd)
+        write_fd = None
+        code = os.read(read_fd, 16)
+        if not code:
+            with open(log_path, 'a') as log:
+                log.write(f"\n[para-pytest] subinterpreter failed: {error}\n")
+            return 3
+        return int(code)
+    finally:
+        if write_fd is not None:
+            os.close(write_fd)
+        os.close(read_fd)
+        interpreters.destroy(interpreter)
@@ -0,0 +1,103 @@
+import datetime
+import re
+import socket
+from typing import Optional
+from xml.sax.saxutils import escape, quoteattr
+
+from .results import FailedTest
+
+
+ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+# Characters not allowed in XML 1.0 documents
+ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+# Room kept in the <testsuite> tag for the totals, only known at the end
+SUITE_ATTRIBUTES_SPACE = 256
+
+
+def _clean(text: str) -> str:
+    return ILLEGAL_XML.sub('', ANSI_ESCAPE.sub('', text))
+
+
+def _names(nodeid: str):
+    """classname and name of a test in the style of pytest's own junitxml"""
+    parts = nodeid.split('::')
+    module = parts[0]
+    if module.endswith('.py'):
+        module = module[:-3]
+    classname = '.'.join([module.replace('/', '.').replace('\\', '.')] + parts[1:-1])
+    return classname, parts[-1]
+
+
+def _message(text: str) -> str:
+    """First exception line of a failure, like the E lines pytest prints"""
+    lines = text.strip().splitlines()
+    for line in lines:
+        if line.startswith('E '):
+            return line[1:].strip()
+    return lines[-1] if lines else ''
+
+
+class JUnitXmlWriter:
+    """
+    Stream <testcase> elements to a JUnit XML file as results arrive.
+
+    Only the totals are kept in memory. They are written into space reserved
+    in the <testsuite> tag when the file is closed.
+    """
+
+    def __init__(self, path: str, suite_name: str = 'para-pytest'):
+        self.file = open(path, 'wb')
+        self.hostname = socket.gethostname()
+        self.timestamp = datetime.datetime.now().isoformat(timespec='seconds')
+        self.counts = {'tests': 0, 'failures': 0, 'errors': 0, 'skipped': 0}
+
+        self.file.write(b'<?xml version="1.0" encoding="utf-8"?>\n<testsuites>\n')
+        self.file.write(f'<testsuite name={quoteattr(suite_name)}'.encode())
+        self.attributes_offset = self.file.tell()
+        self.file.write(b' ' * SUITE_ATTRIBUTES_SPACE + b'>\n')
+
+    def add(self, nodeid: str, outcome: str, duration: float, failure: Optional[FailedTest], worker: Optional[str]):
+        """Result listener, see ResultAggregator.listeners"""
+        classname, name = _names(nodeid)
+        self.counts['tests'] += 1
+
+        attributes = f'classname={quoteattr(classname)} name={quoteattr(name)} time="{duration:.3f}" hostname={quoteattr(self.hostname)}'
+        if worker:
+            attributes += f' worker={quoteattr(worker)}'
+
+        body = ''
+        if outcome in ('failed', 'error'):
+            tag = 'failure' if outcome == 'failed' else 'error'
+            self.counts['failures' if outcome == 'failed' else 'errors'] += 1
+            text = _clean(failure.longrepr) if failure else ''
+            message = _message(text) or outcome
+            body = f'<{tag} message={quoteattr(message)}>{escape(text)}</{tag}>'
+        elif outcome in ('skipped', 'xfailed'):
+            self.counts['skipped'] += 1
+            body = f'<skipped message={quoteattr("expected failure" if outcome == "xfailed" else "skipped")}/>'
+
+        if body:
+            element = f'<testcase {attributes}>{body}</testcase>\n'
+        else:
+            element = f'<testcase {attributes}/>\n'
+        self.file.write(element.encode('utf-8'))
+
+    def add_missing(self, nodeid: str):
+        """An error for a collected test without a result, e.g. after its worker crashed"""
+        text = "Test was never executed, its worker exited before reporting a result"
+        self.add(nodeid, 'error', 0.0, FailedTest(nodeid, 'error', '', text), None)
+
+    def close(self, total_time: float):
+        self.file.write(b'</testsuite>\n</testsuites>\n')
+
+        attributes = ' ' + ' '.join(f'{key}="{value}"' for key, value in self.counts.items())
+        attributes += f' time="{total_time:.3f}" timestamp="{self.timestamp}"'
+        hostname = f' hostname={quoteattr(self.hostname)}'
+        if len(attributes) + len(hostname.encode('utf-8')) <= SUITE_ATTRIBUTES_SPACE:
+            attributes += hostname
+        attributes = attributes.encode('utf-8')
+
+        self.file.seek(self.attributes_offset)
+        self.file.write(attributes)
+        self.file.close()
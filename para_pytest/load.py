@@ -0,0 +1,139 @@
+"""
+Host load sampling and an adjustable worker limit for --adaptive.
+
+On Linux the pressure stall information in /proc/pressure is used: the share
+of time some tasks were stalled waiting for CPU or memory since the previous
+sample. Elsewhere, or on kernels without PSI, the 1 minute load average per
+core is used instead.
+"""
+import asyncio
+import os
+from typing import Dict, Optional
+
+
+PRESSURE_DIR = '/proc/pressure'
+
+# Stalled share of wall time above which workers are removed, and below which they are added
+CPU_PRESSURE_HIGH = 0.40
+CPU_PRESSURE_LOW = 0.10
+MEMORY_PRESSURE_HIGH = 0.05
+MEMORY_PRESSURE_LOW = 0.01
+
+# Load average per core used without PSI
+LOAD_HIGH = 1.25
+LOAD_LOW = 0.90
+
+
+def _read_stall_total(resource: str) -> Optional[int]:
+    """Total microseconds some tasks stalled on resource, None without PSI"""
+    try:
+        with open(os.path.join(PRESSURE_DIR, resource), 'r') as f:
+            for line in f:
+                if line.startswith('some '):
+                    for field in line.split()[1:]:
+                        key, _, value = field.partition('=')
+                        if key == 'total':
+                            return int(value)
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def cpu_count() -> int:
+    """CPUs this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def free_cpus() -> Optional[int]:
+    """CPUs not busy according to the load average, None where there is none"""
+    try:
+        load = os.getloadavg()[0]
+    except (AttributeError, OSError):
+        return None
+    return max(0, round(cpu_count() - load))
+
+
+class LoadMonitor:
+    """Samples host load and decides whether to run more or fewer workers"""
+
+    def __init__(self):
+        self.cpu_total = _read_stall_total('cpu')
+        self.memory_total = _read_stall_total('memory')
+        self.time = asyncio.get_running_loop().time()
+
+    @property
+    def source(self) -> str:
+        return 'psi' if self.cpu_total is not None else 'loadavg'
+
+    def sample(self) -> Dict[str, float]:
+        """Pressure since the previous sample as fractions of wall time, or the load per core"""
+        now = asyncio.get_running_loop().time()
+        elapsed = max(now - self.time, 1e-6)
+        self.time = now
+
+        if self.cpu_total is None:
+            try:
+                return {'load': os.getloadavg()[0] / cpu_count()}
+            except (AttributeError, OSError):
+                return {}
+
+        sample = {}
+        for resource in ('cpu', 'memory'):
+            previous = getattr(self, f'{resource}_total')
+            total = _read_stall_total(resource)
+            if previous is not None and total is not None:
+                sample[resource] = (total - previous) / 1e6 / elapsed
+            setattr(self, f'{resource}_total', total)
+        return sample
+
+    def decide(self, sample: Dict[str, float]) -> int:
+        """-1 to remove a worker, 1 to add one, 0 to keep the count"""
+        if 'load' in sample:
+            if sample['load'] > LOAD_HIGH:
+                return -1
+            if sample['load'] < LOAD_LOW:
+                return 1
+            return 0
+
+        cpu = sample.get('cpu', 0.0)
+        memory = sample.get('memory', 0.0)
+        if cpu > CPU_PRESSURE_HIGH or memory > MEMORY_PRESSURE_HIGH:
+            return -1
+        if cpu < CPU_PRESSURE_LOW and memory < MEMORY_PRESSURE_LOW:
+            return 1
+        return 0
+
+
+class ConcurrencyLimiter:
+    """
+    Semaphore whose limit can change while it is in use.
+
+    Lowering the limit doesn't stop running workers, new ones wait until
+    fewer than `limit` are active. Waiters are let in in arrival order.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.active = 0
+        self.condition = asyncio.Condition()
+
+    @property
+    def over_limit(self) -> bool:
+        return self.active > self.limit
+
+    async def set_limit(self, limit: int):
+        async with self.condition:
+            self.limit = limit
+            self.condition.notify_all()
+
+    async def __aenter__(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *exc_info):
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
@@ -0,0 +1,124 @@
+"""
+OpenMetrics text export of run statistics for --metrics-file.
+
+The file is rewritten after every run, atomically, so a scraper like
+node_exporter's textfile collector never reads a partial file. Worker busy
+time is the time spent in tests, idle time the rest of the worker's life:
+interpreter startup, collection and exit.
+"""
+import os
+import time
+from typing import Dict, List
+
+from .results import RunResult
+
+
+# Upper bounds of the test duration histogram, in seconds
+DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0]
+
+PREFIX = 'para_pytest'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsWriter:
+    """Collects metric families and renders them in the OpenMetrics text format"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def family(self, name: str, kind: str, help_text: str, unit: str = None):
+        self.lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+        if unit:
+            self.lines.append(f"# UNIT {PREFIX}_{name} {unit}")
+        self.lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+
+    def sample(self, name: str, value: float, **labels: str):
+        self.lines.append(f"{PREFIX}_{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, values: List[float], buckets: List[float]):
+        values = sorted(values)
+        position = 0
+        for bound in buckets:
+            while position < len(values) and values[position] <= bound:
+                position += 1
+            self.sample(f"{name}_bucket", position, le=repr(bound))
+        self.sample(f"{name}_bucket", len(values), le='+Inf')
+        self.sample(f"{name}_count", len(values))
+        self.sample(f"{name}_sum", round(sum(values), 6))
+
+    def render(self) -> str:
+        return '\n'.join(self.lines + ['# EOF']) + '\n'
+
+
+def render(result: RunResult, slots: int, timestamp: float = None) -> str:
+    """Metrics of a run on `slots` worker slots"""
+    metrics = MetricsWriter()
+    stats = result.stats
+
+    metrics.family('tests', 'gauge', "Tests of the last run by state")
+    for state in ('collected', 'executed', 'passed', 'failed', 'skipped', 'errors'):
+        metrics.sample('tests', stats[state], state=state)
+    metrics.sample('tests', len(stats['missing']), state='missing')
+
+    metrics.family('exit_code', 'gauge', "Exit code of the last run")
+    metrics.sample('exit_code', result.exit_code)
+
+    metrics.family('run_seconds', 'gauge', "Wall time of the last run, from starting the first worker to the end", 'seconds')
+    metrics.sample('run_seconds', round(result.run_time, 6))
+
+    metrics.family('collection_seconds', 'gauge', "Time the last run spent collecting tests", 'seconds')
+    metrics.sample('collection_seconds', round(result.collection_time, 6))
+
+    metrics.family('last_run_timestamp_seconds', 'gauge', "When the last run finished, in seconds since the epoch", 'seconds')
+    metrics.sample('last_run_timestamp_seconds', round(timestamp if timestamp is not None else time.time(), 3))
+
+    busy: Dict[str, float] = {}
+    durations = []
+    for test in result.tests:
+        if test.outcome is None:
+            continue
+        durations.append(test.duration)
+        if test.worker is not None:
+            busy[test.worker] = busy.get(test.worker, 0.0) + test.duration
+
+    metrics.family('worker_busy_seconds', 'gauge', "Time each worker of the last run spent in tests", 'seconds')
+    for worker in result.workers:
+        metrics.sample('worker_busy_seconds', round(busy.get(worker.name, 0.0), 6), worker=worker.name)
+
+    metrics.family('worker_idle_seconds', 'gauge', "Time each worker of the last run spent outside of tests", 'seconds')
+    for worker in result.workers:
+        metrics.sample('worker_idle_seconds', round(max(0.0, worker.duration - busy.get(worker.name, 0.0)), 6), worker=worker.name)
+
+    metrics.family('worker_slots', 'gauge', "Workers the last run could run at the same time")
+    metrics.sample('worker_slots', slots)
+
+    metrics.family('slot_idle_seconds', 'gauge', "Worker slot time of the last run not spent in tests", 'seconds')
+    metrics.sample('slot_idle_seconds', round(max(0.0, slots * result.run_time - sum(busy.values())), 6))
+
+    metrics.family('test_duration_seconds', 'histogram', "Durations of the tests executed in the last run, all phases", 'seconds')
+    metrics.histogram('test_duration_seconds', durations, DURATION_BUCKETS)
+
+    return metrics.render()
+
+
+def write(path: str, text: str):
+    """Replace path with text, so readers see the old or the new file"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.tmp")
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
@@ -0,0 +1,60 @@
+"""
+CPU placement of worker processes.
+
+Each worker slot gets an equal share of the CPUs this process may run on.
+Workers can be pinned to their share with sched_setaffinity, and native
+thread pools (OpenMP, OpenBLAS, MKL) are sized to it, so N workers don't each
+start one thread per core.
+"""
+import os
+from typing import List, Optional
+
+from .load import cpu_count
+
+
+NATIVE_THREAD_VARS = ['OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS']
+
+
+def available_cpus() -> List[int]:
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(cpu_count()))
+
+
+def cpu_shares(cpus: List[int], slots: int) -> List[List[int]]:
+    """
+    Split cpus into one contiguous share per worker slot.
+
+    With more slots than CPUs, slots share single CPUs round robin.
+    """
+    if slots <= len(cpus):
+        return [cpus[i * len(cpus) // slots:(i + 1) * len(cpus) // slots] for i in range(slots)]
+    return [[cpus[i % len(cpus)]] for i in range(slots)]
+
+
+def can_pin() -> bool:
+    return hasattr(os, 'sched_setaffinity')
+
+
+def pin(pid: int, cpus: List[int]) -> bool:
+    """Restrict a process to cpus, False if it is gone or pinning is not supported"""
+    if not can_pin():
+        return False
+    try:
+        os.sched_setaffinity(pid, cpus)
+    except OSError:
+        return False
+    return True
+
+
+def native_thread_env(setting: Optional[str], share: int) -> dict:
+    """
+    Thread pool variables for a worker with share CPUs.
+
+    setting is 'auto' for the share, a number for a fixed count, or 'off'.
+    Variables already set in the environment are left alone.
+    """
+    if setting is None or setting == 'off':
+        return {}
+    threads = str(max(1, share)) if setting == 'auto' else str(int(setting))
+    return {name: threads for name in NATIVE_THREAD_VARS if name not in os.environ}
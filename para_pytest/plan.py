@@ -0,0 +1,212 @@
+"""
+``para-pytest plan``: predict the wall time of a run before running it.
+
+The tests are collected and chunked exactly as a run would, then the run is
+simulated with the recorded test durations and worker startup cost: chunks
+are started in the runner's order on the first free worker slot. End-of-run
+rebalancing is not simulated, so predictions are slightly pessimistic for
+uneven plans.
+"""
+import argparse
+import heapq
+import json
+from typing import Dict, List, Optional, Tuple
+
+from .durations import DEFAULT_WORKER_STARTUP, DurationStore
+from .load import cpu_count
+from .reporting import Reporter
+from .runner import Chunk, ParaPytestRunner
+
+
+# A plan within this fraction of the fastest one is preferred when it uses fewer workers
+RECOMMEND_TOLERANCE = 0.05
+
+PLAN_VERSION = 1
+
+
+class Plan:
+    """Chunks for a worker count and schedule, with their simulated timeline"""
+
+    def __init__(self, workers: int, schedule: str, chunks: List[Chunk], durations: DurationStore, default: float, startup: float):
+        self.workers = workers
+        self.schedule = schedule
+        self.chunks = chunks
+        self.durations = durations
+        # Duration assumed for tests without a recorded one
+        self.default = default
+        self.startup = startup
+        self.loads = [sum(self.duration(test) for test in chunk) for chunk in chunks]
+        # chunk index -> (slot, start, end)
+        self.timeline: Dict[int, Tuple[int, float, float]] = {}
+        self.simulate()
+
+    def duration(self, test: str) -> float:
+        return self.durations.total(test, self.default)
+
+    def simulate(self):
+        # Same start order as ParaPytestRunner.run_all_chunks: serial chunk, then longest first
+        order = sorted(range(len(self.chunks)), key=lambda i: (not self.chunks[i].serial, -self.loads[i]))
+        slots = [(0.0, slot) for slot in range(self.workers)]
+        for index in order:
+            free, slot = heapq.heappop(slots)
+            end = free + self.startup + self.loads[index]
+            self.timeline[index] = (slot, free, end)
+            heapq.heappush(slots, (end, slot))
+
+    @property
+    def makespan(self) -> float:
+        return max((end for _, _, end in self.timeline.values()), default=0.0)
+
+    @property
+    def imbalance(self) -> float:
+        """Longest chunk over the average chunk"""
+        if not self.loads:
+            return 1.0
+        mean = sum(self.loads) / len(self.loads)
+        return max(self.loads) / mean if mean else 1.0
+
+    def critical_path(self) -> List[int]:
+        """Chunks run one after another on the slot that finishes last"""
+        if not self.timeline:
+            return []
+        last = max(self.timeline, key=lambda index: self.timeline[index][2])
+        slot = self.timeline[last][0]
+        return sorted((index for index, (s, _, _) in self.timeline.items() if s == slot), key=lambda index: self.timeline[index][1])
+
+    def to_json(self) -> Dict:
+        return {
+            'version': PLAN_VERSION,
+            'workers': self.workers,
+            'schedule': self.schedule,
+            'predicted_seconds': round(self.makespan, 3),
+            'worker_startup': round(self.startup, 3),
+            'chunks': [
+                {'serial': chunk.serial, 'io': chunk.io, 'predicted_seconds': round(load, 3), 'tests': list(chunk)}
+                for chunk, load in zip(self.chunks, self.loads)
+            ],
+        }
+
+
+def load_plan(path: str) -> Tuple[int, List[Chunk]]:
+    """Worker count and chunks of a plan written by ``para-pytest plan --output``"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or data.get('version') != PLAN_VERSION:
+        raise ValueError(f"{path} is not a para-pytest plan")
+    try:
+        chunks = [Chunk(chunk['tests'], serial=chunk.get('serial', False), io=chunk.get('io', False)) for chunk in data['chunks']]
+        return int(data['workers']), chunks
+    except (KeyError, TypeError, AttributeError) as error:
+        raise ValueError(f"{path} is not a valid plan: {error!r}") from None
+
+
+def median_duration(durations: DurationStore, tests: List[str]) -> float:
+    known = sorted(durations.total(test) for test in tests if test in durations)
+    return known[len(known) // 2] if known else 0.0
+
+
+def make_plans(runner: ParaPytestRunner, tests: List[str], worker_counts: List[int], schedules: List[str]) -> List[Plan]:
+    """Chunk tests like a run with each worker count and schedule would"""
+    durations = runner.durations
+    default = median_duration(durations, tests)
+    startup = durations.worker_startup if durations.worker_startup is not None else DEFAULT_WORKER_STARTUP
+
+    plans = []
+    for schedule in schedules:
+        for workers in worker_counts:
+            runner.schedule = schedule
+            runner.chunks = runner.workers = workers
+            plans.append(Plan(workers, schedule, runner.chunk_tests(tests), durations, default, startup))
+    return plans
+
+
+def recommend(plans: List[Plan]) -> Plan:
+    fastest = min(plan.makespan for plan in plans)
+    good = [plan for plan in plans if plan.makespan <= fastest * (1 + RECOMMEND_TOLERANCE)]
+    return min(good, key=lambda plan: (plan.workers, plan.makespan))
+
+
+def print_report(plans: List[Plan], best: Plan, sequential: float, top: int = 5):
+    bold = '\033[1m'
+    green = '\033[32m'
+    reset = '\033[0m'
+
+    print(f"\nSequential test time: {sequential:.2f}s, worker startup: {best.startup:.2f}s\n")
+    print(f"{'workers':>8}  {'schedule':<8}  {'predicted':>10}  {'speedup':>8}  {'imbalance':>9}")
+    for plan in plans:
+        marker = f"  {green}<- recommended{reset}" if plan is best else ""
+        speedup = sequential / plan.makespan if plan.makespan else 0.0
+        print(f"{plan.workers:>8}  {plan.schedule:<8}  {plan.makespan:>9.2f}s  {speedup:>7.1f}x  {plan.imbalance:>9.2f}{marker}")
+
+    print(f"\n{bold}Chunks for --chunks {best.workers} --schedule {best.schedule}:{reset}")
+    for index, (chunk, load) in enumerate(zip(best.chunks, best.loads)):
+        slot, start, end = best.timeline[index]
+        kind = " (serial)" if chunk.serial else " (I/O)" if chunk.io else ""
+        print(f"  Chunk {index + 1}{kind}: {len(chunk)} tests, {load:.2f}s, worker slot {slot + 1} from {start:.2f}s to {end:.2f}s")
+
+    path = best.critical_path()
+    print(f"\n{bold}Critical path ({best.makespan:.2f}s):{reset} " + " -> ".join(f"chunk {index + 1}" for index in path))
+    on_path = [test for index in path for test in best.chunks[index]]
+    slowest = sorted(on_path, key=lambda test: -best.duration(test))[:top]
+    if slowest:
+        print("  Slowest tests on it:")
+        for test in slowest:
+            print(f"    {best.duration(test):8.2f}s  {test}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="para-pytest plan",
+        description="Predict the wall time of a run for several worker counts and schedules, using recorded durations"
+    )
+    parser.add_argument("--path", type=str, default='.', help="Path to tests (default: current directory)")
+    parser.add_argument(
+        "--workers",
+        type=str,
+        default=None,
+        help="Comma separated worker counts to compare (default: 1, 2, 4, 8, 16 up to twice the CPU count)"
+    )
+    parser.add_argument(
+        "--schedule",
+        type=str,
+        default='index,scope',
+        help="Comma separated schedules to compare (default: index,scope)"
+    )
+    parser.add_argument("--collect-workers", type=int, default=1, help="Collect tests in this many parallel shards (default: 1)")
+    parser.add_argument("--output", type=str, default=None, metavar="PATH", help="Write the recommended plan as JSON, run it with para-pytest --plan PATH")
+    parser.add_argument("--debug", action="store_true", help="Show collection and chunking details")
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        worker_counts = sorted({int(count) for count in args.workers.split(',')})
+    else:
+        limit = 2 * cpu_count()
+        worker_counts = sorted({count for count in (1, 2, 4, 8, 16) if count <= limit} | {cpu_count()})
+    schedules = [schedule.strip() for schedule in args.schedule.split(',')]
+    for schedule in schedules:
+        if schedule not in ('index', 'scope'):
+            parser.error(f"unknown schedule {schedule!r}, expected index or scope")
+
+    runner = ParaPytestRunner(pytest_args=[args.path], debug=args.debug, collect_workers=args.collect_workers)
+    tests = runner.collect_tests()
+    if not tests:
+        print("No tests collected")
+        return 0
+    if not any(test in runner.durations for test in tests):
+        print("No recorded durations for these tests, run para-pytest once to record them")
+        return 1
+
+    # Chunking messages were shown once by collection, keep the comparison quiet
+    terminal, runner.reporter = runner.reporter, Reporter()
+    plans = make_plans(runner, tests, worker_counts, schedules)
+    runner.reporter = terminal
+
+    best = recommend(plans)
+    sequential = sum(best.duration(test) for test in tests)
+    print_report(plans, best, sequential)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(best.to_json(), f, indent=1)
+        print(f"\nPlan written to {args.output}, run it with: para-pytest --plan {args.output}")
+    return 0
@@ -0,0 +1,327 @@
+"""
+Worker-side pytest plugin used by para-pytest.
+
+Loaded into every worker with ``-p para_pytest.plugin``.
+"""
+import cProfile
+import importlib
+import io
+import json
+import os
+import sys
+import time
+from typing import List
+
+import pytest
+from _pytest.config import create_terminal_writer
+
+from .results import OUTCOME_CODES
+
+
+stdin_nodeids_key = pytest.StashKey()
+coverage_key = pytest.StashKey()
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('para-pytest')
+    group.addoption(
+        '--para-report',
+        dest='para_report',
+        default=None,
+        help="Write a compact para-pytest result stream to this file",
+    )
+    group.addoption(
+        '--para-nodeids',
+        dest='para_nodeids',
+        default=None,
+        help="Only run the node IDs listed in this file, one per line ('-' reads stdin)",
+    )
+    group.addoption(
+        '--para-revoke',
+        dest='para_revoke',
+        default=None,
+        help="Skip not yet started tests whose node IDs are appended to this file",
+    )
+    group.addoption(
+        '--para-cov-data',
+        dest='para_cov_data',
+        default=None,
+        help="Measure coverage into this data file",
+    )
+    group.addoption(
+        '--para-cov-source',
+        dest='para_cov_source',
+        action='append',
+        default=[],
+        help="Source to measure coverage for, may be repeated",
+    )
+    group.addoption(
+        '--para-profile',
+        dest='para_profile',
+        default=None,
+        help="Profile the tests with cProfile into this file",
+    )
+    group.addoption(
+        '--para-profile-nodeids',
+        dest='para_profile_nodeids',
+        default=None,
+        help="Only profile the node IDs listed in this file, one per line",
+    )
+    group.addoption(
+        '--para-importtime',
+        dest='para_importtime',
+        action='store_true',
+        default=False,
+        help="The worker profiles its imports, don't pass PYTHONPROFILEIMPORTTIME on to subprocesses of tests",
+    )
+
+
+@pytest.hookimpl(hookwrapper=True, tryfirst=True)
+def pytest_load_initial_conftests(early_config, parser, args):
+    # stdin has to be read before pytest starts capturing it
+    if early_config.known_args_namespace.para_nodeids == '-':
+        early_config.stash[stdin_nodeids_key] = sys.stdin.read().splitlines()
+    # Start measuring before conftest.py files import the code under test
+    data_file = early_config.known_args_namespace.para_cov_data
+    if data_file:
+        from .cov import start
+        early_config.stash[coverage_key] = start(data_file, early_config.known_args_namespace.para_cov_source)
+    if early_config.known_args_namespace.para_importtime:
+        # Read once at interpreter startup, this process keeps profiling
+        os.environ.pop('PYTHONPROFILEIMPORTTIME', None)
+        # pytest imports conftest.py files and test modules with importlib.import_module, which -X importtime doesn't see
+        importlib.import_module = _profiled_import_module
+    yield
+
+
+_import_module = importlib.import_module
+
+
+def _profiled_import_module(name, package=None):
+    """importlib.import_module through the import statement's path, which -X importtime reports"""
+    if name.startswith('.'):
+        return _import_module(name, package)
+    __import__(name)
+    return sys.modules[name]
+
+
+@pytest.hookimpl(trylast=True)
+def pytest_unconfigure(config):
+    if config.getoption('para_importtime'):
+        importlib.import_module = _import_module
+    cov = config.stash.get(coverage_key, None)
+    if cov is not None:
+        cov.stop()
+        cov.save()
+
+
+def pytest_configure(config):
+    path = config.getoption('para_report')
+    recorder = None
+    if path:
+        recorder = ResultRecorder(path, config)
+        config.pluginmanager.register(recorder, 'para-pytest-recorder')
+
+    revoke = config.getoption('para_revoke')
+    if revoke and recorder is not None:
+        config.pluginmanager.register(Revoker(revoke, recorder), 'para-pytest-revoker')
+
+    profile = config.getoption('para_profile')
+    if profile:
+        only = None
+        if config.getoption('para_profile_nodeids'):
+            with open(config.getoption('para_profile_nodeids'), 'r', encoding='utf-8') as f:
+                only = f.read().splitlines()
+        config.pluginmanager.register(Profiler(profile, only), 'para-pytest-profiler')
+
+    nodeids = config.getoption('para_nodeids')
+    if nodeids == '-':
+        config.pluginmanager.register(NodeIdFilter(config.stash[stdin_nodeids_key]), 'para-pytest-nodeids')
+    elif nodeids:
+        with open(nodeids, 'r', encoding='utf-8') as f:
+            config.pluginmanager.register(NodeIdFilter(f.read().splitlines()), 'para-pytest-nodeids')
+
+
+class NodeIdFilter:
+    """
+    Deselect every collected item that is not in the node ID list.
+
+    The worker is given the files of its chunk as arguments, so each module is
+    collected once and then filtered here instead of pytest parsing thousands
+    of node ID arguments.
+    """
+
+    def __init__(self, nodeids: List[str]):
+        self.positions = {nodeid: i for i, nodeid in enumerate(nodeid for nodeid in nodeids if nodeid)}
+
+    def pytest_collection_modifyitems(self, config, items):
+        selected = []
+        deselected = []
+        for item in items:
+            if item.nodeid in self.positions:
+                selected.append(item)
+            else:
+                deselected.append(item)
+
+        # Run in the order of the list, like node IDs given on the command line
+        selected.sort(key=lambda item: self.positions[item.nodeid])
+
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = selected
+
+
+class Revoker:
+    """
+    Give tests back to the parent, which runs them in another worker.
+
+    The parent appends node IDs to the revoke file when other workers are
+    idle. Before each test the file is checked for new ones. The revoked tests
+    that have not started yet are acknowledged with a V record and skipped,
+    the others are left to finish.
+    """
+
+    def __init__(self, path: str, recorder: 'ResultRecorder'):
+        self.path = path
+        self.recorder = recorder
+        self.offset = 0
+        self.items = []
+        self.position = 0
+        self.revoked = set()
+
+    def pytest_collection_finish(self, session):
+        self.items = session.items
+
+    @pytest.hookimpl(tryfirst=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if os.path.getsize(self.path) > self.offset:
+            self._read()
+        self.position += 1
+        if item.nodeid in self.revoked:
+            # Handled, no reports for this item
+            return True
+        return None
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+        # Only complete lines, the parent may still be writing
+        data = data[:data.rfind(b'\n') + 1]
+        self.offset += len(data)
+
+        requested = set(data.decode('utf-8').splitlines())
+        for item in self.items[self.position:]:
+            if item.nodeid in requested and item.nodeid not in self.revoked:
+                self.revoked.add(item.nodeid)
+                self.recorder.revoke(item.nodeid)
+
+
+class Profiler:
+    """Profile setup, call and teardown of every test, or only of the listed ones, into one file"""
+
+    def __init__(self, path: str, nodeids: List[str] = None):
+        self.path = path
+        self.nodeids = set(nodeids) if nodeids is not None else None
+        self.profile = cProfile.Profile()
+        self.profiled = 0
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_protocol(self, item, nextitem):
+        if self.nodeids is not None and item.nodeid not in self.nodeids:
+            yield
+            return
+        try:
+            self.profile.enable()
+        except ValueError:
+            # Another profiler is active, e.g. one the test started
+            yield
+            return
+        yield
+        self.profile.disable()
+        self.profiled += 1
+
+    def pytest_unconfigure(self, config):
+        # pstats can't load a profile without any calls
+        if self.profiled:
+            self.profile.dump_stats(self.path)
+
+
+class ResultRecorder:
+    """Append one record per finished test to the report file, see ResultAggregator.feed"""
+
+    def __init__(self, path: str, config):
+        self.config = config
+        self.file = open(path, 'w', encoding='utf-8')
+        self.nodeids = {}
+        self.pending = {}
+        self.cpu_start = {}
+
+    def _intern(self, nodeid: str) -> int:
+        index = self.nodeids.get(nodeid)
+        if index is None:
+            index = self.nodeids[nodeid] = len(self.nodeids)
+            self.file.write(f"N\t{index}\t{nodeid}\n")
+        return index
+
+    def pytest_runtest_logstart(self, nodeid, location):
+        # CPU time of the whole process, so threads and fixtures the test uses count too
+        self.cpu_start[nodeid] = time.process_time()
+
+    def pytest_runtest_logreport(self, report):
+        state = self.pending.setdefault(report.nodeid, {'outcome': 'passed', 'longrepr': None})
+        state[report.when] = report.duration
+
+        wasxfail = hasattr(report, 'wasxfail')
+        if report.when == 'call':
+            if wasxfail:
+                state['outcome'] = 'xfailed' if report.skipped else 'xpassed'
+            else:
+                state['outcome'] = report.outcome
+        elif report.failed and state['outcome'] == 'passed':
+            state['outcome'] = 'error'
+        elif report.skipped and report.when == 'setup':
+            state['outcome'] = 'xfailed' if wasxfail else 'skipped'
+
+        if report.failed and state['longrepr'] is None:
+            headline = report.head_line or report.nodeid
+            if report.when != 'call':
+                headline = f"ERROR at {report.when} of {headline}"
+            state['longrepr'] = [headline, self._render(report)]
+
+        if report.when == 'teardown':
+            state['cpu'] = time.process_time() - self.cpu_start.pop(report.nodeid, time.process_time())
+            self._write(report.nodeid, self.pending.pop(report.nodeid))
+
+    def _render(self, report) -> str:
+        """Failure text as the terminal reporter would print it, colored if the worker's output is"""
+        output = io.StringIO()
+        tw = create_terminal_writer(self.config, output)
+        report.toterminal(tw)
+
+        showcapture = self.config.getoption('showcapture', 'all')
+        if showcapture != 'no':
+            for name, content in report.sections:
+                if showcapture == 'all' or showcapture in name:
+                    tw.sep('-', name)
+                    tw.line(content.rstrip('\n'))
+
+        return output.getvalue().rstrip('\n')
+
+    def _write(self, nodeid: str, state: dict):
+        index = self._intern(nodeid)
+        # Failure text comes first so the result record completes the test
+        if state['longrepr'] is not None:
+            self.file.write(f"L\t{index}\t{json.dumps(state['longrepr'])}\n")
+        self.file.write(
+            f"R\t{index}\t{OUTCOME_CODES[state['outcome']]}\t"
+            f"{state.get('setup', 0.0):.6f}\t{state.get('call', 0.0):.6f}\t{state.get('teardown', 0.0):.6f}\t{state['cpu']:.6f}\n"
+        )
+        self.file.flush()
+
+    def revoke(self, nodeid: str):
+        self.file.write(f"V\t{self._intern(nodeid)}\n")
+        self.file.flush()
+
+    def pytest_unconfigure(self, config):
+        self.file.close()
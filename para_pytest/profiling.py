@@ -0,0 +1,59 @@
+"""
+cProfile of test execution across workers for --profile.
+
+Every worker profiles the setup, call and teardown of its tests, or only of
+the ones matching the --profile patterns, into its own ``.prof`` file, see
+the --para-profile plugin option. The parent merges them into one pstats
+file, which works with any pstats viewer (``python -m pstats``, snakeviz),
+and a text summary of the top functions.
+"""
+import glob
+import io
+import os
+import pstats
+from typing import Optional, Tuple
+
+from .durations import CACHE_DIR
+
+
+DEFAULT_OUTPUT = os.path.join(CACHE_DIR, 'profile.prof')
+
+
+def merge(directory: str, output: str) -> Tuple[int, Optional[pstats.Stats]]:
+    """Merge the .prof files in directory into output, return how many there were and the stats"""
+    stats = None
+    count = 0
+    for path in sorted(glob.glob(os.path.join(directory, '*.prof'))):
+        try:
+            if stats is None:
+                stats = pstats.Stats(path)
+            else:
+                stats.add(path)
+        except (OSError, TypeError, EOFError, ValueError):
+            # A worker that crashed while writing it
+            continue
+        finally:
+            os.unlink(path)
+        count += 1
+
+    if stats is not None:
+        os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+        stats.dump_stats(output)
+    return count, stats
+
+
+def summary(stats: pstats.Stats, top: int, sort: str = 'cumulative') -> str:
+    """The top functions as printed by pstats, with paths shortened"""
+    output = io.StringIO()
+    stats.stream = output
+    stats.strip_dirs().sort_stats(sort).print_stats(top)
+    return output.getvalue().strip('\n')
+
+
+def write_summary(text: str, output: str) -> str:
+    """Write the summary next to the merged file, profile.prof -> profile.txt"""
+    path = f"{os.path.splitext(output)[0]}.txt"
+    with open(path, 'w') as f:
+        f.write(text + '\n')
+    return path
+
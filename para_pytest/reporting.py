@@ -0,0 +1,139 @@
+import shutil
+from typing import List, Optional
+
+from .results import FailedTest, RunResult, WorkerResult
+
+
+class Reporter:
+    """
+    Receives the progress of a run, see ParaPytestRunner(reporter=...).
+
+    Every method is a no-op here, so subclasses only implement what they want
+    to show. Reporter() itself gives a silent run. test_finished is called
+    for every test as its result arrives.
+    """
+
+    def collection_finished(self, tests: List[str]):
+        pass
+
+    def collection_failed(self, where: Optional[str], error: str):
+        pass
+
+    def serial_tests(self, tests: List[str]):
+        pass
+
+    def run_started(self, chunks: List[List[str]]):
+        pass
+
+    def test_finished(self, nodeid: str, outcome: str, duration: float, failure: Optional[FailedTest], worker: Optional[str]):
+        pass
+
+    def worker_finished(self, worker: WorkerResult):
+        pass
+
+    def run_finished(self, result: RunResult):
+        pass
+
+    def message(self, text: str):
+        pass
+
+
+class TerminalReporter(Reporter):
+    """Colored terminal output in the style of pytest"""
+
+    cyan = '\033[36m'
+    bold = '\033[1m'
+    red = '\033[31m'
+    green = '\033[32m'
+    yellow = '\033[33m'
+    reset = '\033[0m'
+
+    def __init__(self, debug: bool = False):
+        self.debug = debug
+
+    def collection_finished(self, tests: List[str]):
+        print(f"Collected {len(tests)} tests")
+
+    def collection_failed(self, where: Optional[str], error: str):
+        where = f" in {where}" if where else ""
+        if len(error) > 0:
+            print(f"Error Collecting Tests{where}:\n{error}")
+        else:
+            print(f"Error Collecting Tests{where}. Process Exited.")
+
+    def serial_tests(self, tests: List[str]):
+        print(f"{self.yellow}ℹ️  {len(tests)} tests configured to run serially{self.reset}")
+
+    def run_started(self, chunks: List[List[str]]):
+        print(f"\nRunning tests...")
+
+    def message(self, text: str):
+        print(text)
+
+    def run_finished(self, result: RunResult):
+        """Print final test summary"""
+        red, green, yellow, cyan, bold, reset = self.red, self.green, self.yellow, self.cyan, self.bold, self.reset
+        stats = result.stats
+        term_width = shutil.get_terminal_size().columns
+
+        if stats['missing']:
+            print(f"\n{red}⚠️  CRITICAL: {len(stats['missing'])} tests were NEVER executed!{reset}")
+            if self.debug or len(stats['missing']) <= 10:
+                print(f"{red}Missing tests:{reset}")
+                for test in sorted(stats['missing']):
+                    print(f"  {red}- {test}{reset}")
+            else:
+                print(f"{red}Missing tests (showing first 10):{reset}")
+                for test in sorted(stats['missing'][:10]):
+                    print(f"  {red}- {test}{reset}")
+                print(f"  {red}... and {len(stats['missing']) - 10} more (use --debug to see all){reset}")
+            print()
+
+        if result.exit_code == 0:
+            print(f"{green}{bold}{stats['passed']} passed{reset}{green} in {result.run_time:.2f}s{reset}")
+            return
+
+        # Print failure details
+        self._print_failure_details(result, term_width)
+
+        # Print failed test summary
+        print(f"{cyan}{bold}{'=' * ((term_width - 24) // 2)} short test summary info {'=' * ((term_width - 24) // 2)}{reset}\n")
+
+        for failure in result.failures:
+            if failure.outcome == 'failed':
+                print(f"{red}FAILED{reset} {failure.nodeid}")
+            elif failure.outcome == 'error':
+                print(f"{red}ERROR{reset} {failure.nodeid}")
+
+        # Print summary statistics
+        summary_parts = []
+        if stats['failed'] > 0:
+            summary_parts.append(f"{red}{bold}{stats['failed']} failed{reset}")
+        if stats['errors'] > 0:
+            summary_parts.append(f"{red}{stats['errors']} errors{reset}")
+        if stats['passed'] > 0:
+            summary_parts.append(f"{green}{stats['passed']} passed{reset}")
+        if stats['skipped'] > 0:
+            summary_parts.append(f"{yellow}{stats['skipped']} skipped{reset}")
+        if stats['missing']:
+            summary_parts.append(f"{red}{len(stats['missing'])} not executed{reset}")
+
+        print(f"\n{', '.join(summary_parts)} {red}in {result.run_time:.2f}s{reset}")
+
+    def _print_failure_details(self, result: RunResult, term_width: int):
+        """Print the failure text recorded for each failed test, and the log tail of workers that crashed"""
+        red, bold, reset = self.red, self.bold, self.reset
+
+        for failure in result.failures:
+            padding = max(0, term_width - len(failure.headline) - 2) // 2
+            print(f"{red}{bold}{'_' * padding} {failure.headline} {'_' * padding}{reset}")
+            print(failure.longrepr)
+            print()
+
+        for worker in result.workers:
+            if worker.crashed:
+                print(f"{red}{bold}Worker exited with code {worker.exit_code}, output in {worker.log_path}:{reset}")
+                with open(worker.log_path, 'r', errors='replace') as f:
+                    tail = f.readlines()[-20:]
+                print(''.join(tail).rstrip('\n'))
+                print()
@@ -0,0 +1,288 @@
+import json
+from array import array
+from typing import Callable, Dict, List, Optional
+
+
+# Single character outcome codes written by the worker plugin
+OUTCOME_CODES = {
+    'passed': 'p',
+    'failed': 'f',
+    'skipped': 's',
+    'error': 'e',
+    'xfailed': 'x',
+    'xpassed': 'X',
+}
+OUTCOMES = {code: outcome for outcome, code in OUTCOME_CODES.items()}
+
+NOT_EXECUTED = 0
+
+
+class FailedTest:
+    """Failure text of a single failed or errored test"""
+
+    __slots__ = ('nodeid', 'outcome', 'headline', 'longrepr')
+
+    def __init__(self, nodeid: str, outcome: str, headline: str, longrepr: str):
+        self.nodeid = nodeid
+        self.outcome = outcome
+        self.headline = headline
+        self.longrepr = longrepr
+
+
+class TestResult:
+    """Outcome, phase durations and worker of a single test"""
+
+    __slots__ = ('nodeid', 'outcome', 'setup', 'call', 'teardown', 'worker', 'cpu')
+    # Not a test class, even when imported into a test module
+    __test__ = False
+
+    def __init__(self, nodeid: str, outcome: Optional[str], setup: float = 0.0, call: float = 0.0, teardown: float = 0.0, worker: Optional[str] = None, cpu: float = 0.0):
+        self.nodeid = nodeid
+        # None for tests that were never executed
+        self.outcome = outcome
+        self.setup = setup
+        self.call = call
+        self.teardown = teardown
+        self.worker = worker
+        # CPU time of the worker process while the test ran
+        self.cpu = cpu
+
+    @property
+    def duration(self) -> float:
+        return self.setup + self.call + self.teardown
+
+    def __repr__(self):
+        return f"TestResult({self.nodeid!r}, {self.outcome!r}, duration={self.duration:.3f}, worker={self.worker!r})"
+
+
+class WorkerResult:
+    """Exit code, log file and wall time of one worker process"""
+
+    __slots__ = ('name', 'exit_code', 'log_path', 'tests', 'duration')
+
+    def __init__(self, name: str, exit_code: int, log_path: str, tests: int, duration: float):
+        self.name = name
+        self.exit_code = exit_code
+        self.log_path = log_path
+        self.tests = tests
+        self.duration = duration
+
+    @property
+    def crashed(self) -> bool:
+        # Exit codes 1 (tests failed) and 5 (no tests) are covered by the records
+        return self.exit_code not in (0, 1, 5)
+
+
+class RunResult:
+    """
+    Result of ParaPytestRunner.run_async.
+
+    stats has the counts of ResultAggregator.stats, tests one TestResult per
+    collected test in collection order, and failures the FailedTest of every
+    failed or errored test. Times are in seconds. coverage is the total
+    percentage with --cov, otherwise None.
+    """
+
+    def __init__(self, exit_code: int, stats: Dict, tests: List[TestResult], failures: List[FailedTest], workers: List[WorkerResult], collection_time: float = 0.0, run_time: float = 0.0, coverage: Optional[float] = None):
+        self.exit_code = exit_code
+        self.stats = stats
+        self.tests = tests
+        self.failures = failures
+        self.workers = workers
+        self.collection_time = collection_time
+        self.run_time = run_time
+        self.coverage = coverage
+
+    @property
+    def missing(self) -> List[str]:
+        return self.stats['missing']
+
+    @property
+    def total_time(self) -> float:
+        return self.collection_time + self.run_time
+
+    @property
+    def passed(self) -> bool:
+        return self.exit_code == 0
+
+    def __repr__(self):
+        return f"RunResult(exit_code={self.exit_code}, tests={len(self.tests)}, failures={len(self.failures)}, missing={len(self.missing)})"
+
+
+class ResultAggregator:
+    """
+    Streaming aggregation of worker result streams.
+
+    Outcomes and phase durations live in arrays indexed by the position of the
+    test in the collected list, so node IDs are only held once, by the caller's
+    list. Only failures keep their text.
+    """
+
+    def __init__(self, collected_tests: List[str]):
+        self.collected_tests = collected_tests
+        self.positions = {nodeid: i for i, nodeid in enumerate(collected_tests)}
+        self.outcomes = bytearray(len(collected_tests))
+        self.setup = array('d', bytes(8 * len(collected_tests)))
+        self.call = array('d', bytes(8 * len(collected_tests)))
+        self.teardown = array('d', bytes(8 * len(collected_tests)))
+        self.cpu = array('d', bytes(8 * len(collected_tests)))
+        # Index into worker_names, 0 for tests without a known worker
+        self.workers = array('H', bytes(2 * len(collected_tests)))
+        self.worker_names: List[Optional[str]] = [None]
+        self.worker_indexes: Dict[Optional[str], int] = {None: 0}
+        # Tests that ran but were not part of the collected list
+        self.extra = {}
+        self.counts = dict.fromkeys(OUTCOME_CODES, 0)
+        self.executed = 0
+        self.failures = []
+        # Called with (nodeid, outcome, duration, failure, worker) as results arrive
+        self.listeners: List[Callable] = []
+
+    def add(self, nodeid: str, code: str, setup: float, call: float, teardown: float, failure: Optional[FailedTest] = None, worker: Optional[str] = None, cpu: float = 0.0):
+        """Record the result of one test"""
+        outcome = OUTCOMES[code]
+        position = self.positions.get(nodeid)
+
+        if position is None:
+            previous = self.extra.get(nodeid)
+            self.extra[nodeid] = ord(code)
+        else:
+            previous = self.outcomes[position] or None
+            self.outcomes[position] = ord(code)
+            self.setup[position] = setup
+            self.call[position] = call
+            self.teardown[position] = teardown
+            self.cpu[position] = cpu
+            self.workers[position] = self._worker_index(worker)
+
+        if previous is None:
+            self.executed += 1
+        else:
+            self.counts[OUTCOMES[chr(previous)]] -= 1
+        self.counts[outcome] += 1
+
+        if failure is not None:
+            self.failures.append(failure)
+
+        for listener in self.listeners:
+            listener(nodeid, outcome, setup + call + teardown, failure, worker)
+
+    def has_result(self, nodeid: str) -> bool:
+        position = self.positions.get(nodeid)
+        if position is None:
+            return nodeid in self.extra
+        return self.outcomes[position] != NOT_EXECUTED
+
+    def _worker_index(self, worker: Optional[str]) -> int:
+        index = self.worker_indexes.get(worker)
+        if index is None:
+            index = self.worker_indexes[worker] = len(self.worker_names)
+            self.worker_names.append(worker)
+        return index
+
+    def busy_time(self) -> Dict[str, float]:
+        """Seconds each worker spent in tests"""
+        totals = [0.0] * len(self.worker_names)
+        setup, call, teardown = self.setup, self.call, self.teardown
+        for position, index in enumerate(self.workers):
+            if index:
+                totals[index] += setup[position] + call[position] + teardown[position]
+        return dict(zip(self.worker_names[1:], totals[1:]))
+
+    def feed(self, path: str, worker: Optional[str] = None):
+        """Consume a complete record stream"""
+        ReportReader(path, worker).read(self)
+
+    def missing(self) -> List[str]:
+        """Collected tests without a result"""
+        missing = []
+        position = self.outcomes.find(NOT_EXECUTED)
+        while position != -1:
+            missing.append(self.collected_tests[position])
+            position = self.outcomes.find(NOT_EXECUTED, position + 1)
+        return missing
+
+    def stats(self) -> Dict:
+        """Counts per outcome plus the missing tests"""
+        return {
+            'collected': len(self.collected_tests),
+            'executed': self.executed,
+            'passed': self.counts['passed'],
+            'failed': self.counts['failed'],
+            'skipped': self.counts['skipped'],
+            'errors': self.counts['error'],
+            'missing': self.missing(),
+        }
+
+    def exit_code(self) -> int:
+        """0 when every collected test ran without failing, 1 otherwise"""
+        if self.counts['failed'] or self.counts['error'] or self.outcomes.find(NOT_EXECUTED) != -1:
+            return 1
+        return 0
+
+    def test_results(self) -> List[TestResult]:
+        """A TestResult for every collected test, in collection order"""
+        return [
+            TestResult(
+                nodeid,
+                OUTCOMES[chr(self.outcomes[position])] if self.outcomes[position] else None,
+                self.setup[position],
+                self.call[position],
+                self.teardown[position],
+                self.worker_names[self.workers[position]],
+                self.cpu[position],
+            )
+            for position, nodeid in enumerate(self.collected_tests)
+        ]
+
+
+class ReportReader:
+    """
+    Incremental reader of a record stream written by para_pytest.plugin.
+
+    Each call to read consumes the complete records written since the last
+    one, so results can be followed while the worker is still running. The
+    stream is tab separated, one record per line:
+        N <id> <nodeid>                                  - interns a node ID
+        L <id> <json [headline, text]>                   - failure text, failures only
+        R <id> <outcome> <setup> <call> <teardown> <cpu> - result, phase durations and CPU time
+        V <id>                                           - test given back unstarted, see plugin.Revoker
+    """
+
+    def __init__(self, path: str, worker: Optional[str] = None):
+        self.path = path
+        self.worker = worker
+        self.offset = 0
+        self.partial = b''
+        self.nodeids: Dict[str, str] = {}
+        self.failures: Dict[str, FailedTest] = {}
+        self.revoked: List[str] = []
+
+    def read(self, results: ResultAggregator):
+        """Feed the records written since the last read into results"""
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read()
+            self.offset = f.tell()
+
+        lines = (self.partial + data).split(b'\n')
+        # The last element is a record still being written, or empty
+        self.partial = lines.pop()
+
+        for line in lines:
+            kind, index, *rest = line.decode('utf-8', 'replace').split('\t', 2)
+            rest = rest[0] if rest else ''
+
+            if kind == 'N':
+                self.nodeids[index] = rest
+            elif kind == 'L':
+                headline, longrepr = json.loads(rest)
+                self.failures[index] = FailedTest(self.nodeids[index], '', headline, longrepr)
+            elif kind == 'R':
+                code, setup, call, teardown, cpu = rest.split('\t')
+                failure = self.failures.pop(index, None)
+                if failure is not None:
+                    failure.outcome = OUTCOMES[code]
+                results.add(self.nodeids[index], code, float(setup), float(call), float(teardown), failure, self.worker, float(cpu))
+            elif kind == 'V':
+                self.revoked.append(self.nodeids[index])
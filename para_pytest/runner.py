@@ -1,26 +1,163 @@
 import argparse
 import asyncio
 import fnmatch
-import json
+import heapq
 import os
 import re
-import subprocess
 import sys
 import tempfile
 import time
-from typing import List, Tuple, Dict
+import uuid
+from collections import Counter
+from typing import List, Tuple, Dict, Optional
 import shutil
 
+from . import cov as coverage_support, metrics, profiling
+from .budget import DEFERRED_PATH, select_tests, write_deferred
+from .durations import CACHE_DIR, DurationStore
+from .history import DurationHistory
+from .importtime import StartupProfile, parse as parse_importtime, split_output
+from .inprocess import BACKENDS, available_backend, run_in_interpreter, run_in_thread
+from .junit import JUnitXmlWriter
+from .load import ConcurrencyLimiter, LoadMonitor, cpu_count, free_cpus
+from .placement import available_cpus, can_pin, cpu_shares, native_thread_env, pin
+from .reporting import Reporter, TerminalReporter
+from .results import ReportReader, ResultAggregator, RunResult, WorkerResult
+from .shared import SHARED_DIR_ENV
+from .watch import IGNORED_DIRS, Watcher, WarmPool, affected_test_files, is_test_file, walk_dirs
+
+
+LOG_DIR = os.path.join(CACHE_DIR, 'logs')
+
+# Per-worker coverage data files are combined from here
+COVERAGE_DIR = os.path.join(CACHE_DIR, 'coverage')
+
+# Log directories of earlier runs kept next to the current one
+LOG_RUNS_KEPT = 4
+
+# Per-worker cap on logged output
+LOG_SIZE_LIMIT = 1024 * 1024
+
+# Seconds between reads of a running worker's result stream
+RESULT_POLL_INTERVAL = 0.1
+
+# Estimated seconds of remaining work below which a worker's tail is not worth moving,
+# a new worker has to start and collect first
+REBALANCE_MIN_SECONDS = 2.0
+
+# Seconds an idle worker waits for a busy one to finish a first test, so its remaining work can be estimated
+REBALANCE_ESTIMATE_WAIT = 30.0
+
+# Seconds between load samples in adaptive mode
+ADAPT_INTERVAL = 1.0
+
+# Recorded CPU time over wall time below which a test counts as I/O bound
+IO_BOUND_RATIO = 0.5
+
+
+class CollectionError(Exception):
+    """pytest failed to collect the tests"""
+
+
+class Chunk(list):
+    """Node IDs run together by one worker process"""
+
+    def __init__(self, tests: List[str] = (), serial: bool = False, io: bool = False):
+        super().__init__(tests)
+        self.serial = serial
+        # Runs in the I/O pool, see ParaPytestRunner(io_workers=...)
+        self.io = io
+
+
+class RunningChunk:
+    """A chunk whose worker is running, tracked so idle workers can take over its tail"""
+
+    def __init__(self, tests: List[str], reader: ReportReader, revoke_path: str):
+        self.tests = tests
+        self.reader = reader
+        self.revoke_path = revoke_path
+        self.requested = set()
+        self.done = False
+
 
 class ParaPytestRunner:
     """
     Pytest runner that chunks tests and runs in parallel for faster CLI testing
     """
 
-    def __init__(self, chunks: int = 4, pytest_args: List[str] = None, debug: bool = False, serial_patterns: List[str] = None):
+    def __init__(
+        self,
+        chunks: int = 4,
+        pytest_args: List[str] = None,
+        debug: bool = False,
+        serial_patterns: List[str] = None,
+        *,
+        workers: int = None,
+        schedule: str = 'index',
+        collect_workers: int = 1,
+        rebalance: bool = True,
+        adaptive: bool = False,
+        min_workers: int = 1,
+        io_workers: int = 0,
+        time_budget: float = None,
+        precompile: bool = False,
+        reporter: Reporter = None,
+        junitxml: str = None,
+        metrics_file: str = None,
+        cov: bool = False,
+        cov_sources: List[str] = None,
+        cov_reports: List[str] = None,
+        profile_startup: bool = False,
+        profile: bool = False,
+        profile_patterns: List[str] = None,
+        profile_output: str = None,
+        profile_top: int = 20,
+        backend: str = 'subprocess',
+        subprocess_patterns: List[str] = None,
+        pin_cpus: bool = None,
+        native_threads: str = None,
+        plan: str = None,
+    ):
         self.chunks = chunks
         self.pytest_args = pytest_args or []
         self.debug = debug
+        self.workers = workers or chunks
+        self.schedule = schedule
+        self.collect_workers = collect_workers
+        self.rebalance = rebalance
+        self.adaptive = adaptive
+        self.min_workers = max(1, min(min_workers, self.workers))
+        self.io_workers = io_workers
+        self.time_budget = time_budget
+        self.precompile = precompile
+        
+        self.reporter = reporter or TerminalReporter(debug)
+        self.junitxml = junitxml
+        self.metrics_file = metrics_file
+        
+        self.cov = cov
+        self.cov_sources = cov_sources or []
+        self.cov_reports = cov_reports or ['term']
+        
+        self.profile_startup = profile_startup
+        self.profile = profile
+        self.profile_patterns = profile_patterns or []
+        self.profile_output = profile_output or profiling.DEFAULT_OUTPUT
+        self.profile_top = profile_top
+        
+        # State of the current run
+        self.durations = DurationStore().load()
+        self.running: Dict[str, RunningChunk] = {}
+        self.run_id = None
+        self.shared_dir = None
+        self.results = None
+        self.warm_pool = None
+        self.cov_dir = None
+        # worker -> its import tree, with profile_startup
+        self.import_trees: Dict[str, list] = {}
+        self.log_dir = LOG_DIR
+        self.worker_count = 0
+        self.log_size_limit = LOG_SIZE_LIMIT
         
         # Load serial patterns from pyproject.toml or use explicit patterns
         if serial_patterns is not None:
@@ -29,11 +166,95 @@ class ParaPytestRunner:
             self.serial_patterns = self._load_serial_patterns()
         
         if self.debug and self.serial_patterns:
-            print(f"Serial patterns: {self.serial_patterns}")
+            self.reporter.message(f"Serial patterns: {self.serial_patterns}")
+        
+        # Experimental in-process backends, see para_pytest.inprocess
+        self.backend = available_backend(backend)
+        if self.cov and self.backend != 'subprocess':
+            # One coverage tracer per process
+            coverage_support.require_coverage()
+            self.reporter.message(f"Coverage needs a process per worker, using subprocesses instead of the {self.backend} backend")
+            self.backend = 'subprocess'
+        elif (self.profile_startup or self.profile) and self.backend != 'subprocess':
+            self.reporter.message(f"Profiling needs a process per worker, using subprocesses instead of the {self.backend} backend")
+            self.backend = 'subprocess'
+        elif self.backend != backend and backend != 'auto':
+            self.reporter.message(f"The {backend} backend is not available in this Python, using subprocesses")
+        elif self.debug and self.backend != 'subprocess':
+            self.reporter.message(f"Using the {self.backend} backend")
+        
+        # Tests that always run in a subprocess, e.g. modules using extensions that are not thread or subinterpreter safe
+        if subprocess_patterns is not None:
+            self.subprocess_patterns = subprocess_patterns
+        elif self.backend != 'subprocess':
+            self.subprocess_patterns = self._load_config_array('subprocess_patterns')
+        else:
+            self.subprocess_patterns = []
+        
+        # CPU placement of workers, see para_pytest.placement
+        self.pin_cpus = pin_cpus if pin_cpus is not None else bool(self._load_config_value('pin_cpus', False))
+        self.native_threads = str(native_threads if native_threads is not None else self._load_config_value('native_threads', 'auto'))
+        if self.pin_cpus and not can_pin():
+            self.reporter.message("CPU pinning is not supported on this platform")
+            self.pin_cpus = False
+        self.cpu_shares: List[List[int]] = []
+        self.free_slots: List[int] = []
+        
+        # Chunks of a plan written by `para-pytest plan --output`, run as they are
+        self.plan_chunks: Optional[List[Chunk]] = None
+        if plan:
+            from .plan import load_plan
+            self.workers, self.plan_chunks = load_plan(plan)
+            self.min_workers = min(self.min_workers, self.workers)
+            self.io_workers = self.io_workers or sum(1 for chunk in self.plan_chunks if chunk.io)
+            self.rebalance = False
 
 
     def _load_serial_patterns(self) -> List[str]:
         """Load serial patterns from pyproject.toml [tool.para-pytest] section"""
+        return self._load_config_array('serial_patterns')
+
+
+    def _load_config_value(self, key: str, default=None):
+        """Load a string, integer or boolean from pyproject.toml [tool.para-pytest] section"""
+        
+        if not os.path.exists('pyproject.toml'):
+            return default
+        
+        try:
+            with open('pyproject.toml', 'r') as f:
+                content = f.read()
+        except OSError as e:
+            if self.debug:
+                self.reporter.message(f"Warning: Could not read pyproject.toml: {e}")
+            return default
+        
+        in_section = False
+        for line in content.split('\n'):
+            line = line.strip()
+            
+            if line.startswith('[tool.para-pytest]'):
+                in_section = True
+                continue
+            elif line.startswith('[') and in_section:
+                break
+            
+            if in_section and '=' in line and line.split('=', 1)[0].strip() == key:
+                value = line.split('=', 1)[1].split('#', 1)[0].strip()
+                if value in ('true', 'false'):
+                    return value == 'true'
+                if value[:1] in ('"', "'"):
+                    return value.strip('"\'')
+                try:
+                    return int(value)
+                except ValueError:
+                    return value
+        
+        return default
+
+
+    def _load_config_array(self, key: str) -> List[str]:
+        """Load a string array from pyproject.toml [tool.para-pytest] section"""
         
         if not os.path.exists('pyproject.toml'):
             return []
@@ -55,7 +276,7 @@ class ParaPytestRunner:
                 elif line.startswith('[') and in_section:
                     break
                 
-                if in_section and 'serial_patterns' in line and '=' in line:
+                if in_section and line.split('=', 1)[0].strip() == key and '=' in line:
                     in_array = True
                     if '[' in line and ']' in line:
                         patterns.extend(self._parse_toml_array(line[line.index('['):line.index(']')+1]))
@@ -72,13 +293,13 @@ class ParaPytestRunner:
                         patterns.extend(self._parse_toml_array(line))
             
             if patterns and self.debug:
-                print(f"Loaded {len(patterns)} serial patterns from pyproject.toml")
+                self.reporter.message(f"Loaded {len(patterns)} {key.replace('_', ' ')} from pyproject.toml")
             
             return patterns
             
         except Exception as e:
             if self.debug:
-                print(f"Warning: Could not parse pyproject.toml: {e}")
+                self.reporter.message(f"Warning: Could not parse pyproject.toml: {e}")
             return []
 
 
@@ -111,6 +332,15 @@ class ParaPytestRunner:
         return False
 
 
+    def _matches_subprocess_pattern(self, test: str) -> bool:
+        """Check if a test must run in a subprocess worker"""
+        return any(self._matches_pattern_single(test, pattern) for pattern in self.subprocess_patterns)
+
+
+    def _matches_profile_pattern(self, test: str) -> bool:
+        return any(self._matches_pattern_single(test, pattern) for pattern in self.profile_patterns)
+
+
     def _matches_serial_pattern(self, test: str) -> bool:
         """
         Check if a test matches any serial pattern.
@@ -123,39 +353,155 @@ class ParaPytestRunner:
         return any(self._matches_pattern_single(test, pattern) for pattern in self.serial_patterns)
 
 
-    def collect_tests(self) -> List[str]:
-        cmd = ["pytest", "--collect-only", "-q"] + self.pytest_args
+    def collect_tests(self, paths: List[str] = None) -> List[str]:
+        try:
+            return asyncio.run(self.collect_tests_async(paths))
+        except CollectionError:
+            sys.exit(1)
+
+
+    async def collect_tests_async(self, paths: List[str] = None) -> List[str]:
+        """Collect node IDs, raising CollectionError if pytest fails to collect"""
+        # Directory each shard stands for, in collection error messages
+        labels = [None]
+        if paths is not None:
+            # Keep options but collect only the given paths
+            shards = [[arg for arg in self.pytest_args if arg.startswith('-')] + paths]
+        elif self.collect_workers > 1 and len(self.pytest_args) == 1 and os.path.isdir(self.pytest_args[0]):
+            # Every shard collects the whole path minus the other shards' directories,
+            # so pytest's norecursedirs, collect_ignore and virtualenv rules still apply
+            sharded = self._collection_shards(self.pytest_args[0], self.collect_workers)
+            shards = [
+                [f"--rootdir={os.getcwd()}", self.pytest_args[0]] + [f"--ignore={ignored}" for ignored in ignores]
+                for _, ignores in sharded
+            ]
+            labels = [directory for directory, _ in sharded]
+            if self.debug:
+                self.reporter.message(f"Collecting in {len(shards)} shards")
+                # One-off check that sharding doesn't change the collected tests
+                shards.append([f"--rootdir={os.getcwd()}", self.pytest_args[0]])
+        else:
+            shards = [self.pytest_args]
         
         # Prevent line wrapping in pytest output
         env = os.environ.copy()
         env['COLUMNS'] = '9999'
         env['LINES'] = '9999'
         
-        collected = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            env=env,
-        )
+        semaphore = asyncio.Semaphore(self.collect_workers)
         
-        if collected.returncode != 0 and collected.returncode != 5:
-            if len(collected.stderr) > 0:
-                print(f"Error Collecting Tests:\n{collected.stderr}")
-            else:
-                print("Error Collecting Tests. Process Exited.")
-            sys.exit(1)
+        async def collect_shard(args: List[str]) -> Tuple[int, str, str]:
+            async with semaphore:
+                process = await asyncio.create_subprocess_exec(
+                    "pytest", "--collect-only", "-q", *args,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    env=env
+                )
+                stdout, stderr = await process.communicate()
+                return process.returncode, stdout.decode(), stderr.decode()
+        
+        collected = await asyncio.gather(*[collect_shard(args) for args in shards])
+        
+        unsharded = None
+        if len(shards) > len(labels):
+            unsharded = collected.pop()
+            shards.pop()
         
+        failed = False
+        for label, (returncode, _, stderr) in zip(labels, collected):
+            if returncode != 0 and returncode != 5:
+                failed = True
+                self.reporter.collection_failed(label, stderr)
+        if failed:
+            raise CollectionError("pytest failed to collect tests")
+        
+        tests = []
+        for _, stdout, _ in collected:
+            tests.extend(self._parse_collected(stdout))
+        
+        if unsharded is not None:
+            expected = Counter(self._parse_collected(unsharded[1]))
+            found = Counter(tests)
+            if expected != found:
+                error = (
+                    f"sharded collection found {sum((found - expected).values())} extra and "
+                    f"{sum((expected - found).values())} missing tests compared to collecting {self.pytest_args[0]} at once"
+                )
+                self.reporter.message(f"Error: {error}")
+                raise CollectionError(error)
+        
+        # A test collected by two shards would be run twice and reported as not executed once
+        tests = list(dict.fromkeys(tests))
+        
+        self.reporter.collection_finished(tests)
+        return tests
+    
+    def _parse_collected(self, stdout: str) -> List[str]:
+        """Node IDs in the output of pytest --collect-only -q"""
         tests = []
-        for line in collected.stdout.split('\n'):
+        for line in stdout.split('\n'):
             line = line.strip()
             if not line or ' collected' in line or ' passed' in line:
                 continue
             if '::' in line:
                 tests.append(line)
-        
-        print(f"Collected {len(tests)} tests")
         return tests
     
+
+    def _collection_shards(self, path: str, count: int) -> List[Tuple[str, List[str]]]:
+        """
+        Split a directory into about count (directory, ignored directories) shards.
+
+        Directories are expanded breadth first. An expanded directory keeps a
+        shard for its own files, and for the subdirectories that don't get a
+        shard of their own (``_private``, ``build``, ...), that ignores its
+        other subdirectories. Each shard
+        collects the whole path, ignoring the directories next to its own on
+        the way down, so pytest decides which directories to recurse into
+        exactly as without shards. Shards are returned in path order so
+        merging their results is deterministic.
+        """
+        root = os.path.normpath(path)
+        # expanded directory -> its sharded subdirectories, and the entries collected by its own shard
+        expanded: Dict[str, List[str]] = {}
+        files: Dict[str, List[str]] = {}
+        parents: Dict[str, str] = {}
+        frontier = [root]
+        
+        while frontier and len(expanded) + len(frontier) < count:
+            directory = frontier.pop(0)
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                entries = []
+            subdirectories = sorted(
+                os.path.join(directory, entry.name) for entry in entries
+                if entry.is_dir() and not entry.name.startswith(('.', '_')) and entry.name not in IGNORED_DIRS
+            )
+            # conftest.py files stay, the shards below need them. Hidden directories are
+            # never collected, every other entry has to be ignored by the other shards
+            files[directory] = sorted(
+                os.path.join(directory, entry.name) for entry in entries
+                if not entry.name.startswith('.') and entry.name != 'conftest.py'
+                and os.path.join(directory, entry.name) not in subdirectories
+            )
+            expanded[directory] = subdirectories
+            parents.update((subdirectory, directory) for subdirectory in subdirectories)
+            frontier.extend(subdirectories)
+        
+        shards = []
+        for directory in list(expanded) + frontier:
+            ignores = list(expanded.get(directory, []))
+            child = directory
+            while child != root:
+                parent = parents[child]
+                ignores.extend(sibling for sibling in expanded[parent] if sibling != child)
+                ignores.extend(files[parent])
+                child = parent
+            shards.append((directory, sorted(ignores)))
+        return sorted(shards, key=lambda shard: shard[0].split(os.sep))
+    
     
     def chunk_tests(self, tests: List[str]) -> List[List[str]]:
         """Split tests into equal chunks, separating serial tests"""
@@ -172,224 +518,815 @@ class ParaPytestRunner:
                 parallel_tests.append(test)
         
         if serial_tests:
-            yellow = '\033[33m'
-            reset = '\033[0m'
-            print(f"{yellow}ℹ️  {len(serial_tests)} tests configured to run serially{reset}")
+            self.reporter.serial_tests(serial_tests)
             if self.debug:
                 for pattern in self.serial_patterns:
                     matching = [t for t in serial_tests if self._matches_pattern_single(t, pattern)]
                     if matching:
-                        print(f"   Pattern '{pattern}': {len(matching)} tests")
+                        self.reporter.message(f"   Pattern '{pattern}': {len(matching)} tests")
         
-        chunk_size = max(1, len(parallel_tests) // self.chunks)
+        if self.io_workers:
+            # I/O bound tests get their own, oversubscribed pool running next to the CPU bound ones
+            io_tests = [test for test in parallel_tests if self._is_io_bound(test)]
+            if io_tests:
+                selected = set(io_tests)
+                parallel_tests = [test for test in parallel_tests if test not in selected]
+                if self.debug:
+                    self.reporter.message(f"{len(io_tests)} I/O bound tests run on {self.io_workers} I/O workers, {len(parallel_tests)} on {self.workers} CPU workers")
+            chunks = self._split_tests(parallel_tests, self.chunks)
+            chunks.extend(Chunk(chunk, io=True) for chunk in self._split_tests(io_tests, self.io_workers))
+        else:
+            chunks = self._split_tests(parallel_tests, self.chunks)
+        
+        if serial_tests:
+            chunks.append(Chunk(serial_tests, serial=True))
+        
+        return chunks
+    
+
+    def _is_io_bound(self, test: str) -> bool:
+        """Whether a test spent most of its recorded time waiting instead of on the CPU"""
+        ratio = self.durations.cpu_ratio(test)
+        return ratio is not None and ratio < IO_BOUND_RATIO
+
+
+    def _split_tests(self, tests: List[str], count: int) -> List[Chunk]:
+        """Split tests into at most count chunks using the configured schedule"""
+        if self.schedule == 'scope':
+            return [Chunk(chunk) for chunk in self._chunk_by_scope(tests, count)]
+
+        chunk_size = max(1, len(tests) // count)
         chunks = []
 
-        for i in range(0, len(parallel_tests), chunk_size):
-            chunk = parallel_tests[i:i + chunk_size]
+        for i in range(0, len(tests), chunk_size):
+            chunk = Chunk(tests[i:i + chunk_size])
             if chunk:
                 chunks.append(chunk)
 
-        while len(chunks) > self.chunks:
+        while len(chunks) > count:
             chunks[-2].extend(chunks[-1])
             chunks.pop()
-        
-        if serial_tests:
-            chunks.append(serial_tests)
-        
+
         return chunks
-    
 
-    async def run_chunk(self, tests: List[str]) -> Tuple[int, dict]:
-        """Run a single chunk of tests asynchronously"""
 
-        temp_file = tempfile.NamedTemporaryFile(mode='w', delete=False, suffix='.json')
+    def _chunk_by_scope(self, tests: List[str], count: int = None) -> List[List[str]]:
+        """
+        Split tests into chunks keeping module and class groups together.
+
+        Groups are only split when they alone exceed the balanced target, so
+        module and class scoped fixtures are set up once instead of once per
+        chunk. Recorded durations weigh each test when available, and every
+        extra piece of a split group is charged the group's setup cost.
+        """
+        if not tests:
+            return []
+
+        if self.durations:
+            known = sorted(self.durations.total(test) for test in tests if test in self.durations)
+            default = known[len(known) // 2] if known else 1.0
+            weights = [self.durations.total(test, default) for test in tests]
+        else:
+            weights = [1.0] * len(tests)
+
+        count = count or self.chunks
+        target = sum(weights) / count
+
+        # module -> class (or module for plain functions) -> positions, in collection order
+        modules: Dict[str, Dict[str, List[int]]] = {}
+        for position, test in enumerate(tests):
+            parts = test.split('[', 1)[0].split('::')
+            scope = '::'.join(parts[:2]) if len(parts) > 2 else parts[0]
+            modules.setdefault(parts[0], {}).setdefault(scope, []).append(position)
+
+        units = []
+        split_groups = 0
+        for classes in modules.values():
+            module_positions = [position for positions in classes.values() for position in positions]
+            pieces = self._split_group(module_positions, list(classes.values()), weights, tests, target)
+            if len(pieces) > 1:
+                split_groups += 1
+            units.extend(pieces)
+
+        loads = [(0.0, i) for i in range(min(count, len(units)))]
+        assigned: List[List[int]] = [[] for _ in loads]
+        for weight, positions in sorted(units, key=lambda unit: -unit[0]):
+            load, index = heapq.heappop(loads)
+            assigned[index].extend(positions)
+            heapq.heappush(loads, (load + weight, index))
+
+        if self.debug:
+            self.reporter.message(f"Scope scheduling: {len(modules)} modules, {split_groups} split across chunks, target {target:.2f}")
+
+        return [[tests[position] for position in sorted(positions)] for positions in assigned if positions]
+
+
+    def _split_group(self, positions: List[int], subgroups: List[List[int]], weights: List[float], tests: List[str], target: float) -> List[Tuple[float, List[int]]]:
+        """Return (weight, positions) units for a group, splitting it into its subgroups only if it exceeds target"""
+        weight = sum(weights[position] for position in positions)
+        if weight <= target or len(positions) == 1:
+            return [(weight, positions)]
+
+        units: List[Tuple[float, List[int]]] = []
+        if len(subgroups) > 1:
+            # Pack neighbouring subgroups back together while they fit the target
+            for subgroup in subgroups:
+                for unit_weight, unit_positions in self._split_group(subgroup, [subgroup], weights, tests, target):
+                    if units and units[-1][0] + unit_weight <= target:
+                        units[-1] = (units[-1][0] + unit_weight, units[-1][1] + unit_positions)
+                    else:
+                        units.append((unit_weight, unit_positions))
+        else:
+            # A single scope left, cut it into contiguous slices no larger than target
+            piece: List[int] = []
+            piece_weight = 0.0
+            for position in positions:
+                if piece and piece_weight + weights[position] > target:
+                    units.append((piece_weight, piece))
+                    piece, piece_weight = [], 0.0
+                piece.append(position)
+                piece_weight += weights[position]
+            units.append((piece_weight, piece))
+
+        # Every extra piece sets the group's fixtures up again
+        setup_cost = max(self.durations.setup(tests[position]) for position in positions)
+        return units[:1] + [(unit_weight + setup_cost, unit_positions) for unit_weight, unit_positions in units[1:]]
+
+
+    async def run_chunk(self, tests: List[str], results: ResultAggregator, backend: str = None) -> WorkerResult:
+        """Run a single chunk of tests asynchronously and feed its results into the aggregator"""
+
+        temp_file = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.para')
         temp_file.close()
 
+        # Node IDs go through a file to stay clear of ARG_MAX, workers only get the files to collect
+        nodeids_file = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.txt')
+        with nodeids_file:
+            nodeids_file.write('\n'.join(tests) + '\n')
+        test_files = list(dict.fromkeys(test.split('::', 1)[0] for test in tests))
+
+        # The parent appends node IDs to take back from the worker, see plugin.Revoker
+        revoke_file = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.revoke')
+        revoke_file.close()
+
         cmd = [
             "pytest",
             "-q",
             "--color=yes",
-            "--json-report", 
-            f"--json-report-file={temp_file.name}", 
-            "--json-report-indent=2",
-            "--json-report-omit=log"
-        ] + tests
-
-        process = await asyncio.create_subprocess_exec(
-            *cmd,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
-        )
+            "-p", "para_pytest.plugin",
+            f"--para-report={temp_file.name}",
+            f"--para-nodeids={nodeids_file.name}",
+            f"--para-revoke={revoke_file.name}"
+        ]
 
-        stdout, _ = await process.communicate()
+        self.worker_count += 1
+        worker = f"worker-{self.worker_count}"
+        coverage_file = None
+        if self.cov_dir:
+            coverage_file = os.path.join(self.cov_dir, f".coverage.{worker}")
+            cmd.append(f"--para-cov-data={coverage_file}")
+            cmd.extend(f"--para-cov-source={source}" for source in self.cov_sources)
+        log_path = os.path.join(self.log_dir, f"{worker}.log")
+        profile_file = None
+        if self.profile:
+            profiled = [test for test in tests if self._matches_profile_pattern(test)] if self.profile_patterns else tests
+            if profiled:
+                cmd.append(f"--para-profile={os.path.join(self.log_dir, worker)}.prof")
+            if profiled and self.profile_patterns:
+                profile_file = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8', delete=False, suffix='.txt')
+                with profile_file:
+                    profile_file.write('\n'.join(profiled) + '\n')
+                cmd.append(f"--para-profile-nodeids={profile_file.name}")
+        stderr_path = None
+        if self.profile_startup:
+            # Import times are written to fd 2, which fd capture would swallow during collection
+            cmd.extend(["--capture=sys", "--para-importtime"])
+            stderr_path = os.path.join(self.log_dir, f"{worker}.stderr")
+        cmd.extend(test_files)
+        reader = ReportReader(temp_file.name, worker)
+        running = RunningChunk(tests, reader, revoke_file.name)
+        if not getattr(tests, 'serial', False):
+            self.running[worker] = running
 
-        with open(temp_file.name, 'r') as f:
-            report = json.load(f)
+        backend = backend or self.backend
+        if backend != 'subprocess' and any(self._matches_subprocess_pattern(test) for test in tests):
+            backend = 'subprocess'
+
+        time_start = time.time()
+        if backend == 'subprocess':
+            # I/O workers don't get a CPU share
+            slot = self.free_slots.pop(0) if self.free_slots and not getattr(tests, 'io', False) else None
+            cpus = self.cpu_shares[slot] if slot is not None else []
+            env = self._worker_env(cpus)
+            if coverage_file:
+                # Subprocesses of the tests measure next to the worker, see coverage's subprocess support
+                env['COVERAGE_FILE'] = coverage_file
+            if stderr_path:
+                env['PYTHONPROFILEIMPORTTIME'] = '1'
+            process = await self._start_worker(cmd, env, stderr_path)
+            if self.pin_cpus and cpus and not pin(process.pid, cpus) and self.debug:
+                self.reporter.message(f"Could not pin {worker} to CPUs {cpus}")
+            finished = asyncio.ensure_future(asyncio.gather(self._spill_output(process.stdout, log_path), process.wait()))
+        else:
+            run_in_process = run_in_thread if backend == 'thread' else run_in_interpreter
+            finished = asyncio.get_running_loop().run_in_executor(None, run_in_process, cmd[1:], log_path, self.log_size_limit)
 
-        report['colored_output'] = stdout.decode()
+        # Follow the result stream while the worker runs
+        while not finished.done():
+            await asyncio.wait([finished], timeout=RESULT_POLL_INTERVAL)
+            reader.read(results)
+        returncode = process.returncode if backend == 'subprocess' else finished.result()
+        running.done = True
+        if backend == 'subprocess' and slot is not None:
+            self.free_slots.append(slot)
+            self.free_slots.sort()
+        self.running.pop(worker, None)
 
         os.unlink(temp_file.name)
+        os.unlink(nodeids_file.name)
+        os.unlink(revoke_file.name)
+        if profile_file:
+            os.unlink(profile_file.name)
+        if stderr_path and backend == 'subprocess':
+            self._read_import_times(worker, stderr_path, log_path)
+
+        revoked = set(reader.revoked)
+        output = WorkerResult(worker, returncode, log_path, len(tests) - len(revoked), time.time() - time_start)
+        self.reporter.worker_finished(output)
+
+        if backend != 'subprocess':
+            # Tests the in-process backend did not get to, e.g. after an import error, get a subprocess
+            retry = [test for test in tests if not results.has_result(test) and test not in revoked]
+            if retry:
+                self.reporter.message(f"{worker} did not run {len(retry)} tests, retrying them in a subprocess")
+                return await self.run_chunk(retry, results, backend='subprocess')
 
-        return process.returncode, report
+        return output
     
 
-    def validate_execution(self, collected_tests: List[str], results: List[Tuple[int, dict]]) -> Dict:
-        """Validate all tests were executed and return statistics"""
+    async def _take_tail(self, results: ResultAggregator, io: bool = False) -> Optional[Chunk]:
+        """
+        Take the not yet started tail of the busiest worker's chunk for an idle worker.
+
+        Remaining work is estimated from recorded durations, or from the tests
+        the worker finished so far. About half of it is revoked from the end of
+        the chunk. Only workers of the same pool (CPU or I/O) are considered.
+        Returns the tests the worker gave up, empty if none is worth moving,
+        None if nothing is worth moving yet but a worker's remaining work can't
+        be estimated until it finishes a test.
+        """
+        unestimated = False
+        victim = None
+        victim_remaining: List[Tuple[str, float]] = []
+        victim_weight = 0.0
+        for running in list(self.running.values()):
+            if running.done or getattr(running.tests, 'io', False) != io:
+                continue
+            remaining = [test for test in running.tests if not results.has_result(test) and test not in running.requested]
+            weights = self._estimate(running.tests, remaining, results)
+            if weights is None:
+                unestimated = unestimated or len(remaining) >= 2
+                continue
+            weight = sum(weights)
+            if weight > victim_weight:
+                victim, victim_remaining, victim_weight = running, list(zip(remaining, weights)), weight
+
+        # The first remaining test may be running already
+        if victim is None or len(victim_remaining) < 2 or victim_weight < REBALANCE_MIN_SECONDS:
+            return None if unestimated else Chunk(io=io)
+
+        tail: List[str] = []
+        tail_weight = 0.0
+        for test, weight in reversed(victim_remaining[1:]):
+            if tail_weight + weight > victim_weight / 2 and tail:
+                break
+            tail.append(test)
+            tail_weight += weight
+        tail.reverse()
+
+        victim.requested.update(tail)
+        with open(victim.revoke_path, 'a', encoding='utf-8') as f:
+            f.write('\n'.join(tail) + '\n')
+
+        # Wait until the worker acknowledged or ran each of them
+        while not victim.done:
+            revoked = set(victim.reader.revoked)
+            if all(test in revoked or results.has_result(test) for test in tail):
+                break
+            await asyncio.sleep(RESULT_POLL_INTERVAL)
+
+        revoked = set(victim.reader.revoked)
+        taken = Chunk([test for test in tail if test in revoked], io=io)
+        if self.debug and taken:
+            self.reporter.message(f"Rebalancing: moved {len(taken)} tests (~{tail_weight:.1f}s) from {victim.reader.worker}")
+        return taken
+
+
+    def _estimate(self, tests: List[str], remaining: List[str], results: ResultAggregator):
+        """Estimated seconds per remaining test, None without anything to estimate from"""
+        if self.durations and any(test in self.durations for test in remaining):
+            known = sorted(self.durations.total(test) for test in remaining if test in self.durations)
+            default = known[len(known) // 2]
+            return [self.durations.total(test, default) for test in remaining]
+
+        # Average of what this chunk ran so far
+        finished = [results.positions[test] for test in tests if test in results.positions and results.has_result(test)]
+        if not finished:
+            return None
+        average = sum(results.setup[i] + results.call[i] + results.teardown[i] for i in finished) / len(finished)
+        return [average] * len(remaining)
+
+
+    async def _spill_output(self, stream: asyncio.StreamReader, log_path: str):
+        """Write worker output to its log file, up to log_size_limit bytes"""
+        written = 0
+        dropped = 0
+        with open(log_path, 'wb') as log:
+            while True:
+                data = await stream.read(65536)
+                if not data:
+                    break
+                kept = data[:max(0, self.log_size_limit - written)]
+                log.write(kept)
+                written += len(kept)
+                dropped += len(data) - len(kept)
+            if dropped:
+                log.write(f"\n[para-pytest] {dropped} more bytes of output not logged\n".encode())
+
+
+    async def _start_worker(self, cmd: List[str], env: Dict[str, str], stderr_path: str = None) -> asyncio.subprocess.Process:
+        """Start a worker for cmd, reusing a warm process in watch mode, stderr goes to stderr_path if given"""
+        if self.warm_pool is not None:
+            return await self.warm_pool.start(cmd[1:], env)
+
+        if stderr_path is None:
+            return await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                env=env
+            )
+        with open(stderr_path, 'wb') as stderr:
+            return await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE, stderr=stderr, env=env)
+
+
+    def _read_import_times(self, worker: str, stderr_path: str, log_path: str):
+        """Parse a worker's import times, anything else it wrote to stderr goes to its log"""
+        try:
+            with open(stderr_path, 'r', errors='replace') as f:
+                imports, other = split_output(f.read())
+            os.unlink(stderr_path)
+        except OSError:
+            return
+        self.import_trees[worker] = parse_importtime(imports)
+        if other:
+            with open(log_path, 'a') as log:
+                log.write(other)
+
+
+    def _worker_env(self, cpus: List[int] = ()) -> Dict[str, str]:
+        """Environment for worker processes, with native thread pools sized to their CPU share"""
+        env = os.environ.copy()
+        if cpus:
+            env.update(native_thread_env(self.native_threads, len(cpus)))
+        # Size separators in failure text for the parent's terminal
+        env['COLUMNS'] = str(shutil.get_terminal_size().columns)
+        if self.shared_dir:
+            env[SHARED_DIR_ENV] = self.shared_dir
+        return env
+
+
+    def validate_execution(self, results: ResultAggregator) -> Dict:
+        """
+        Validate all tests were executed and return statistics.
+
+        In 0.1.x this took (collected_tests, results) with pytest-json-report
+        reports and returned node ID lists, see ResultAggregator.stats.
+        """
+        return results.stats()
+
+
+    async def run_all_chunks(self, test_chunks: List[List[str]], collection_time: float = 0.0, complete: bool = True) -> RunResult:
+        """
+        Run all test chunks concurrently, collection_time is reported with the results.
+
+        complete=False marks a run of only some of the collected tests, which
+        the duration history doesn't count as a run of the suite.
+        """
+        self.reporter.run_started(test_chunks)
+
+        time_start = time.time()
         
-        executed_tests = set()
-        failed_tests = []
-        passed_tests = []
-        skipped_tests = []
-        error_tests = []
+        all_collected_tests = [test for chunk in test_chunks for test in chunk]
+        results = ResultAggregator(all_collected_tests)
+        results.listeners.append(self.reporter.test_finished)
         
-        for _, report in results:
-            for test in report.get('tests', []):
-                nodeid = test['nodeid']
-                executed_tests.add(nodeid)
-                
-                outcome = test['outcome']
-                if outcome == 'passed':
-                    passed_tests.append(nodeid)
-                elif outcome == 'failed':
-                    failed_tests.append(nodeid)
-                elif outcome == 'skipped':
-                    skipped_tests.append(nodeid)
-                elif outcome == 'error':
-                    error_tests.append(nodeid)
-        
-        missing_tests = set(collected_tests) - executed_tests
-        
-        return {
-            'collected': len(collected_tests),
-            'executed': len(executed_tests),
-            'passed': passed_tests,
-            'failed': failed_tests,
-            'skipped': skipped_tests,
-            'errors': error_tests,
-            'missing': list(missing_tests)
-        }
-
-
-    def print_test_summary(self, stats: Dict, results: List[Tuple[int, dict]], total_time: float) -> int:
-        """Print final test summary and return exit code"""
+        # Cache directory for session fixture values shared between workers, see para_pytest.shared
+        self.run_id = uuid.uuid4().hex[:12]
+        self.shared_dir = tempfile.mkdtemp(prefix=f"para-pytest-{self.run_id}-")
         
-        cyan = '\033[36m'
-        bold = '\033[1m'
-        red = '\033[31m'
-        green = '\033[32m'
-        yellow = '\033[33m'
-        reset = '\033[0m'
-        term_width = shutil.get_terminal_size().columns
-        
-        if stats['missing']:
-            print(f"\n{red}⚠️  CRITICAL: {len(stats['missing'])} tests were NEVER executed!{reset}")
-            if self.debug or len(stats['missing']) <= 10:
-                print(f"{red}Missing tests:{reset}")
-                for test in sorted(stats['missing']):
-                    print(f"  {red}- {test}{reset}")
-            else:
-                print(f"{red}Missing tests (showing first 10):{reset}")
-                for test in sorted(stats['missing'][:10]):
-                    print(f"  {red}- {test}{reset}")
-                print(f"  {red}... and {len(stats['missing']) - 10} more (use --debug to see all){reset}")
-            print()
+        # Worker output goes to log files in a directory per run, so runs can overlap
+        self.log_dir = os.path.join(LOG_DIR, self.run_id)
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._prune_logs()
+        self.worker_count = 0
         
-        all_passed = len(stats['failed']) == 0 and len(stats['errors']) == 0 and not stats['missing']
+        if self.backend != 'subprocess':
+            # In-process workers see the parent's environment
+            os.environ[SHARED_DIR_ENV] = self.shared_dir
         
-        if all_passed:
-            print(f"{green}{bold}{len(stats['passed'])} passed{reset}{green} in {total_time:.2f}s{reset}")
-            return 0
+        if self.cov:
+            self.cov_dir = os.path.join(COVERAGE_DIR, self.run_id)
+            os.makedirs(self.cov_dir, exist_ok=True)
         
-        # Print failure details
-        self._print_failure_details(results, term_width)
-        
-        # Print failed test summary
-        print(f"{cyan}{bold}{'=' * ((term_width - 24) // 2)} short test summary info {'=' * ((term_width - 24) // 2)}{reset}\n")
-        
-        for code, report in results:
-            for test in report.get('tests', []):
-                if test['outcome'] == 'failed':
-                    print(f"{red}FAILED{reset} {test['nodeid']}")
-                elif test['outcome'] == 'error':
-                    print(f"{red}ERROR{reset} {test['nodeid']}")
-        
-        # Print summary statistics
-        summary_parts = []
-        if len(stats['failed']) > 0:
-            summary_parts.append(f"{red}{bold}{len(stats['failed'])} failed{reset}")
-        if len(stats['errors']) > 0:
-            summary_parts.append(f"{red}{len(stats['errors'])} errors{reset}")
-        if len(stats['passed']) > 0:
-            summary_parts.append(f"{green}{len(stats['passed'])} passed{reset}")
-        if len(stats['skipped']) > 0:
-            summary_parts.append(f"{yellow}{len(stats['skipped'])} skipped{reset}")
-        if stats['missing']:
-            summary_parts.append(f"{red}{len(stats['missing'])} not executed{reset}")
-        
-        print(f"\n{', '.join(summary_parts)} {red}in {total_time:.2f}s{reset}")
-        return 1
-
-
-    def _print_failure_details(self, results: List[Tuple[int, dict]], term_width: int):
-        """Extract and print failure details from test results"""
-        
-        for code, report in results:
-            if code != 0:
-                colored_output = report.get('colored_output', '')
-                if 'FAILURES' in colored_output:
-                    start = colored_output.find('FAILURES')
-                    end = colored_output.find('short test summary')
-                    if end != -1:
-                        failure_content = colored_output[start:end].strip()
-                        lines = [line for line in failure_content.split('\n') 
-                                if 'FAILURES' not in line and '===' not in line]
-                        failure_text = '\n'.join(lines)
-                        
-                        adjusted = re.sub(
-                            r'_+\s+(\S+)\s+_+',
-                            lambda m: '_' * ((term_width - len(m.group(1)) - 2) // 2) + ' ' + m.group(1) + ' ' + '_' * ((term_width - len(m.group(1)) - 2) // 2),
-                            failure_text
-                        )
-                        print(adjusted)
-                        print()
-
-
-    async def run_all_chunks(self, test_chunks: List[List[str]]):
-        """Run all test chunks concurrently"""
-        print(f"\nRunning tests...")
-
-        time_start = time.time()
+        # One CPU share per worker slot, handed to workers as they start
+        self.cpu_shares = cpu_shares(available_cpus(), self.workers)
+        self.free_slots = list(range(self.workers))
+        if self.debug:
+            threads = native_thread_env(self.native_threads, len(self.cpu_shares[0]))
+            pinned = "pinned" if self.pin_cpus else "not pinned"
+            self.reporter.message(f"CPU shares per worker: {self.cpu_shares} ({pinned}), thread pools: {threads or 'unchanged'}")
         
-        all_collected_tests = [test for chunk in test_chunks for test in chunk]
+        # At most `workers` chunks run at once, the serial chunk takes one of the slots.
+        # It starts first, followed by the longest chunks when durations are known.
+        limiter = ConcurrencyLimiter(self._initial_workers() if self.adaptive else self.workers)
+        io_limiter = ConcurrencyLimiter(self.io_workers)
+        order = sorted(
+            range(len(test_chunks)),
+            key=lambda i: (not getattr(test_chunks[i], 'serial', False), -sum(self.durations.total(test) for test in test_chunks[i]))
+        )
         
-        tasks = [self.run_chunk(chunk) for chunk in test_chunks]
-        results = await asyncio.gather(*tasks)
+        # Chunks not started yet, per pool
+        waiting = {False: 0, True: 0}
+        for chunk in test_chunks:
+            waiting[getattr(chunk, 'io', False)] += 1
+        rebalanced: List[WorkerResult] = []
         
-        stats = self.validate_execution(all_collected_tests, results)
+        async def run_limited(index: int) -> WorkerResult:
+            io = getattr(test_chunks[index], 'io', False)
+            pool = io_limiter if io else limiter
+            async with pool:
+                waiting[io] -= 1
+                output = await self.run_chunk(test_chunks[index], results)
+                # Nothing left to start, use the slot for the tail of the busiest worker
+                wait_until = None
+                while self.rebalance and waiting[io] == 0 and not pool.over_limit:
+                    tail = await self._take_tail(results, io)
+                    if tail is None:
+                        # Without recorded durations, wait for the busy workers to finish a test
+                        if wait_until is None:
+                            wait_until = time.time() + REBALANCE_ESTIMATE_WAIT
+                        if time.time() >= wait_until:
+                            break
+                        await asyncio.sleep(RESULT_POLL_INTERVAL)
+                        continue
+                    if not tail:
+                        break
+                    wait_until = None
+                    rebalanced.append(await self.run_chunk(tail, results))
+                return output
         
-        total_time = time.time() - time_start
-        return self.print_test_summary(stats, results, total_time)
+        junit = None
+        if self.junitxml:
+            junit = JUnitXmlWriter(self.junitxml)
+            results.listeners.append(junit.add)
+        
+        adapt = asyncio.ensure_future(self._adapt_workers(limiter)) if self.adaptive else None
+        
+        try:
+            # Tasks queue on the limiter in the order they are started
+            ordered_outputs = await asyncio.gather(*[run_limited(index) for index in order])
+            outputs = [output for _, output in sorted(zip(order, ordered_outputs), key=lambda pair: pair[0])] + rebalanced
+        finally:
+            if adapt is not None:
+                adapt.cancel()
+            shutil.rmtree(self.shared_dir, ignore_errors=True)
+            self.shared_dir = None
+            if self.backend != 'subprocess':
+                os.environ.pop(SHARED_DIR_ENV, None)
+            if junit is not None:
+                for nodeid in results.missing():
+                    junit.add_missing(nodeid)
+                junit.close(time.time() - time_start)
+        
+        coverage = None
+        if self.cov_dir:
+            coverage = await self._combine_coverage()
+        
+        stats = self.validate_execution(results)
+        self.results = results
+        
+        if self.profile_startup:
+            self._report_import_times(results, outputs)
+        if self.profile:
+            await self._merge_profiles()
+        
+        try:
+            self.durations.update(results)
+            startup = self._worker_startup(results, outputs)
+            if startup is not None:
+                self.durations.update_startup(startup)
+            self.durations.save()
+            history = DurationHistory().load()
+            history.record(results, complete)
+            history.save()
+        except OSError as e:
+            if self.debug:
+                self.reporter.message(f"Warning: Could not save test durations: {e}")
+        
+        result = RunResult(
+            results.exit_code(), stats, results.test_results(), results.failures, outputs,
+            collection_time=collection_time, run_time=time.time() - time_start, coverage=coverage
+        )
+        if self.metrics_file:
+            self._write_metrics(result)
+        self.reporter.run_finished(result)
+        return result
+
+    def _write_metrics(self, result: RunResult):
+        try:
+            metrics.write(self.metrics_file, metrics.render(result, self.workers + self.io_workers))
+        except OSError as e:
+            self.reporter.message(f"Warning: Could not write metrics to {self.metrics_file}: {e}")
 
-    def run(self):
-        tests = self.collect_tests()
+    async def _combine_coverage(self) -> float:
+        """Combine the workers' coverage data into COVERAGE_FILE (.coverage) and write the reports"""
+        data_file = os.environ.get('COVERAGE_FILE', '.coverage')
+        time_start = time.time()
+        try:
+            count = await coverage_support.combine(self.cov_dir, data_file, os.cpu_count() or 1)
+        finally:
+            shutil.rmtree(self.cov_dir, ignore_errors=True)
+            self.cov_dir = None
+        if self.debug:
+            self.reporter.message(f"Combined {count} coverage data files in {time.time() - time_start:.2f}s")
+        if not count:
+            self.reporter.message("No coverage data was collected")
+            return None
+        
+        total, lines = await asyncio.get_running_loop().run_in_executor(None, coverage_support.report, data_file, self.cov_reports)
+        for line in lines:
+            self.reporter.message(line)
+        return total
+
+    async def _merge_profiles(self):
+        """Merge the workers' profiles into profile_output and show the top functions"""
+        loop = asyncio.get_running_loop()
+        count, stats = await loop.run_in_executor(None, profiling.merge, self.log_dir, self.profile_output)
+        if stats is None:
+            self.reporter.message("No tests were profiled")
+            return
+        text = profiling.summary(stats, self.profile_top)
+        self.reporter.message(f"\n{text}")
+        try:
+            summary_path = profiling.write_summary(text, self.profile_output)
+        except OSError as e:
+            self.reporter.message(f"Warning: Could not write the profile summary: {e}")
+            summary_path = None
+        self.reporter.message(
+            f"Profiles of {count} workers merged into {self.profile_output}"
+            + (f", summary in {summary_path}" if summary_path else "")
+        )
+
+    def _report_import_times(self, results: ResultAggregator, outputs: List[WorkerResult]):
+        profile = StartupProfile()
+        busy = results.busy_time()
+        for output in sorted(outputs, key=lambda output: int(output.name.rsplit('-', 1)[1])):
+            if output.name in self.import_trees:
+                profile.add(output.name, self.import_trees.pop(output.name), output.duration, busy.get(output.name, 0.0))
+        for line in profile.report():
+            self.reporter.message(line)
+
+    def _worker_startup(self, results: ResultAggregator, outputs: List[WorkerResult]) -> Optional[float]:
+        """Median time workers spent outside of their tests in this run"""
+        busy = results.busy_time()
+        overheads = sorted(output.duration - busy.get(output.name, 0.0) for output in outputs if output.tests and not output.crashed)
+        if not overheads:
+            return None
+        return max(0.0, overheads[len(overheads) // 2])
+
+    def _initial_workers(self) -> int:
+        """Worker count to start an adaptive run with, the CPUs left free by other load"""
+        free = free_cpus()
+        workers = self.workers if free is None else max(self.min_workers, min(self.workers, free))
+        if self.debug:
+            self.reporter.message(f"Adaptive: starting with {workers} workers ({free} CPUs free, bounds {self.min_workers}-{self.workers})")
+        return workers
+
+    async def _adapt_workers(self, limiter: ConcurrencyLimiter):
+        """Add or remove a worker slot every ADAPT_INTERVAL seconds depending on host load"""
+        monitor = LoadMonitor()
+        while True:
+            await asyncio.sleep(ADAPT_INTERVAL)
+            sample = monitor.sample()
+            step = monitor.decide(sample)
+            workers = max(self.min_workers, min(self.workers, limiter.limit + step))
+            if workers != limiter.limit:
+                if self.debug:
+                    readings = ', '.join(f"{key} {value:.0%}" if key != 'load' else f"load {value:.2f}/cpu" for key, value in sample.items())
+                    self.reporter.message(f"Adaptive: {readings} ({monitor.source}), {limiter.limit} -> {workers} workers")
+                await limiter.set_limit(workers)
+
+    def _prune_logs(self):
+        """Remove log directories of older runs, keeping the most recent LOG_RUNS_KEPT besides the current one"""
+        try:
+            runs = [entry for entry in os.scandir(LOG_DIR) if entry.is_dir() and entry.path != self.log_dir]
+        except OSError:
+            return
+        runs.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in runs[LOG_RUNS_KEPT:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+    async def precompile_async(self, root: str = '.'):
+        """
+        Compile stale modules under root to bytecode once, in parallel, before workers start.
+
+        Test modules and conftest.py files are left out: pytest compiles them
+        with assertion rewriting during collection. Virtualenvs, build output
+        and hidden directories are not walked at all, the other modules are
+        split between one compileall process per CPU.
+        """
+        time_start = time.time()
+        modules = []
+        for directory in walk_dirs(root):
+            try:
+                names = sorted(os.listdir(directory))
+            except OSError:
+                continue
+            modules.extend(
+                os.path.join(directory, name) for name in names
+                if name.endswith('.py') and name != 'conftest.py' and not is_test_file(name)
+            )
+
+        async def compile_modules(paths: List[str]) -> Tuple[int, bytes]:
+            process = await asyncio.create_subprocess_exec(
+                sys.executable, "-m", "compileall", "-q", "-i", "-",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT
+            )
+            output, _ = await process.communicate(('\n'.join(paths) + '\n').encode())
+            return process.returncode, output
+
+        count = min(cpu_count(), len(modules))
+        compiled = await asyncio.gather(*[compile_modules(modules[i::count]) for i in range(count)])
+        if self.debug:
+            self.reporter.message(f"Precompiled bytecode of {len(modules)} modules in {time.time() - time_start:.2f}s")
+            for returncode, output in compiled:
+                if returncode != 0:
+                    # Files that don't compile fail in the tests that import them
+                    self.reporter.message(output.decode(errors='replace').rstrip('\n'))
+
+    async def run_async(self) -> RunResult:
+        """
+        Collect, chunk and run the tests in the running event loop.
+
+        Progress goes to the reporter. Raises CollectionError when pytest
+        fails to collect the tests.
+        """
+        if self.precompile:
+            await self.precompile_async()
+        
+        if self.plan_chunks is not None:
+            if self.debug:
+                self.reporter.message(f"Running the planned {len(self.plan_chunks)} chunks on {self.workers} workers")
+            return await self.run_all_chunks(self.plan_chunks)
+        
+        time_start = time.time()
+        tests = await self.collect_tests_async()
+        collection_time = time.time() - time_start
         
         if not tests:
-            print("No tests collected")
-            return 0
+            self.reporter.message("No tests collected")
+            result = RunResult(0, ResultAggregator([]).stats(), [], [], [], collection_time=collection_time)
+            if self.metrics_file:
+                self._write_metrics(result)
+            return result
         
-        test_chunks = self.chunk_tests(tests)
+        if self.time_budget:
+            test_chunks = self._chunk_for_budget(tests)
+        else:
+            test_chunks = self.chunk_tests(tests)
         
         if self.debug:
-            print(f"\nSplit into {len(test_chunks)} chunks:")
+            self.reporter.message(f"\nSplit into {len(test_chunks)} chunks:")
             for i, chunk in enumerate(test_chunks, 1):
-                print(f"  Chunk {i}: {len(chunk)} tests")
+                self.reporter.message(f"  Chunk {i}: {len(chunk)} tests")
         
-        return asyncio.run(self.run_all_chunks(test_chunks))
+        complete = sum(len(chunk) for chunk in test_chunks) == len(tests)
+        return await self.run_all_chunks(test_chunks, collection_time, complete)
+
+    def _chunk_for_budget(self, tests: List[str]) -> List[Chunk]:
+        """Chunks of the tests that fit in --time-budget, the others are listed in DEFERRED_PATH"""
+        history = DurationHistory().load()
+        packed, deferred, predicted = select_tests(
+            tests, self.time_budget, self.workers, self.durations, history, self._matches_serial_pattern,
+            chunks=self.chunks, io_workers=self.io_workers, is_io=self._is_io_bound
+        )
+        try:
+            write_deferred(deferred)
+        except OSError as e:
+            self.reporter.message(f"Warning: Could not write the deferred tests: {e}")
+        selected = sum(len(chunk) for pool in packed.values() for chunk in pool)
+        self.reporter.message(
+            f"Time budget {self.time_budget:g}s: running {selected} of {len(tests)} tests "
+            f"({predicted:.1f}s of test time on {self.workers} workers), {len(deferred)} deferred"
+            + (f", listed in {DEFERRED_PATH}" if deferred else "")
+        )
+        if self.debug:
+            for test in deferred:
+                self.reporter.message(f"  Deferred: {test}")
+
+        chunks = [Chunk(chunk) for chunk in packed['cpu']]
+        chunks.extend(Chunk(chunk, io=True) for chunk in packed['io'])
+        for chunk in packed['serial']:
+            self.reporter.serial_tests(chunk)
+            chunks.append(Chunk(chunk, serial=True))
+        return chunks
+
+    def run(self) -> int:
+        try:
+            return asyncio.run(self.run_async()).exit_code
+        except CollectionError:
+            return 1
+
+    def watch(self):
+        """Run all tests, then re-run affected tests and previous failures on every change"""
+        try:
+            return asyncio.run(self._watch_loop())
+        except KeyboardInterrupt:
+            self.reporter.message("\nStopped watching")
+            return 0
+
+    async def _collect_for_watch(self, paths: List[str] = None) -> List[str]:
+        """collect_tests_async that keeps watching after collection errors"""
+        try:
+            return await self.collect_tests_async(paths)
+        except CollectionError:
+            return []
+
+    async def _watch_loop(self):
+        cyan = '\033[36m'
+        reset = '\033[0m'
+
+        watcher = Watcher()
+        watcher.start()
+        self.warm_pool = WarmPool(self.workers)
+        await self.warm_pool.fill()
+
+        try:
+            tests = await self._collect_for_watch()
+            known_test_files = list(dict.fromkeys(test.split('::', 1)[0] for test in tests))
+            if tests:
+                await self.run_all_chunks(self.chunk_tests(tests))
+
+            while True:
+                self.reporter.message(f"\n{cyan}Watching for changes ({watcher.backend}), press Ctrl+C to stop...{reset}")
+                changed = await watcher.changes()
+
+                affected = affected_test_files(changed, known_test_files)
+                if affected is None:
+                    tests = await self._collect_for_watch()
+                    known_test_files = list(dict.fromkeys(test.split('::', 1)[0] for test in tests))
+                else:
+                    tests = await self._collect_for_watch(affected) if affected else []
+                    known_test_files.extend(path for path in affected if path not in known_test_files)
+
+                # Previous failures run after the affected tests, unless their file is gone
+                selected = set(tests)
+                failures = []
+                if self.results is not None:
+                    failures = [
+                        failure.nodeid for failure in self.results.failures
+                        if failure.nodeid not in selected and os.path.exists(failure.nodeid.split('::', 1)[0])
+                    ]
+
+                if not tests and not failures:
+                    self.reporter.message(f"{len(changed)} files changed, no tests affected")
+                    continue
+
+                self.reporter.message(f"\n{cyan}{len(changed)} files changed, re-running {len(tests)} affected tests and {len(failures)} previous failures{reset}")
+                if self.debug:
+                    for path in changed:
+                        self.reporter.message(f"  {path}")
+                await self.run_all_chunks(self.chunk_tests(tests + failures), complete=affected is None)
+        finally:
+            watcher.stop()
+            await self.warm_pool.close()
+            self.warm_pool = None
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'plan':
+        from .plan import main as plan_main
+        sys.exit(plan_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'slow-report':
+        from .history import main as slow_report_main
+        sys.exit(slow_report_main(sys.argv[2:]))
+
     parser = argparse.ArgumentParser(
         description="Run pytest tests in parallel chunks",
-        epilog="Configure serial patterns in pyproject.toml: [tool.para-pytest] serial_patterns = [...]"
+        epilog="Configure serial patterns in pyproject.toml: [tool.para-pytest] serial_patterns = [...]. "
+               "See also 'para-pytest plan --help' and 'para-pytest slow-report --help'."
     )
     parser.add_argument(
         "--chunks",
@@ -397,12 +1334,142 @@ def main():
         default=4,
         help="Number of parallel chunks to divide tests into (default: 4)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Maximum number of chunks running at the same time (default: same as --chunks)"
+    )
+    parser.add_argument(
+        "--io-workers",
+        type=int,
+        default=0,
+        help="Run tests recorded as I/O bound (mostly waiting) on a separate pool of this many workers, "
+             "next to the CPU bound ones on --workers (default: 0, off)"
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Scale the number of running workers between --min-workers and --workers with host CPU and memory pressure"
+    )
+    parser.add_argument(
+        "--min-workers",
+        type=int,
+        default=1,
+        help="Fewest workers --adaptive scales down to (default: 1)"
+    )
     parser.add_argument(
         "--path",
         type=str,
         default='.',
         help="Path to tests (default: current directory)"
     )
+    parser.add_argument(
+        "--collect-workers",
+        type=int,
+        default=1,
+        help="Collect tests in this many parallel shards of the test path (default: 1)"
+    )
+    parser.add_argument(
+        "--schedule",
+        choices=['index', 'scope'],
+        default='index',
+        help="How to split tests: 'index' cuts the test list evenly, 'scope' keeps modules and classes together (default: index)"
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        metavar="SECONDS",
+        help="Only run the tests that fit in SECONDS on the workers: recent failures, new and changed tests, "
+             "then the ones that fail most per second of runtime. The others are listed in " + DEFERRED_PATH
+    )
+    parser.add_argument(
+        "--plan",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Run the chunks of a plan written by 'para-pytest plan --output PATH' instead of collecting and chunking"
+    )
+    parser.add_argument(
+        "--precompile",
+        action="store_true",
+        help="Compile stale modules to bytecode in parallel once before collecting and starting workers"
+    )
+    parser.add_argument(
+        "--cov",
+        action="append",
+        nargs="?",
+        const="",
+        metavar="SOURCE",
+        help="Measure coverage, optionally only of SOURCE (may be repeated); requires para-pytest[cov]"
+    )
+    parser.add_argument(
+        "--cov-report",
+        action="append",
+        choices=coverage_support.REPORTS,
+        help="Coverage report to write, may be repeated (default: term)"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Profile module imports in every worker (-X importtime) and report the slowest ones, "
+             "the merged import tree and startup time per worker"
+    )
+    parser.add_argument(
+        "--profile",
+        action="append",
+        nargs="?",
+        const="",
+        metavar="PATTERN",
+        help="Profile test execution with cProfile, optionally only of tests matching PATTERN (may be repeated)"
+    )
+    parser.add_argument(
+        "--profile-output",
+        type=str,
+        default=profiling.DEFAULT_OUTPUT,
+        metavar="PATH",
+        help=f"Merged pstats file to write, with a text summary next to it (default: {profiling.DEFAULT_OUTPUT})"
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=20,
+        metavar="N",
+        help="Functions to show in the profile summary, by cumulative time (default: 20)"
+    )
+    parser.add_argument(
+        "--metrics-file",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Write run statistics in the OpenMetrics text format to PATH after every run, "
+             "e.g. for node_exporter's textfile collector"
+    )
+    parser.add_argument(
+        "--junitxml",
+        type=str,
+        default=None,
+        metavar="PATH",
+        help="Write a JUnit XML report of all chunks to PATH"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default='subprocess',
+        help="Experimental: run chunks in threads on free-threaded Python ('thread') or in subinterpreters on 3.12+ ('interpreter'), "
+             "'auto' picks one, falling back to subprocesses (default: subprocess)"
+    )
+    parser.add_argument(
+        "--no-rebalance",
+        action="store_true",
+        help="Don't move not yet started tests from busy workers to idle ones at the end of a run"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and re-run affected tests and previous failures when files change"
+    )
     parser.add_argument(
         "--debug",
         action="store_true",
@@ -410,12 +1477,42 @@ def main():
     )
 
     args = parser.parse_args()
-    runner = ParaPytestRunner(
-        chunks=args.chunks, 
-        pytest_args=[args.path], 
-        debug=args.debug
-    )
-    sys.exit(runner.run())
+    if args.profile_startup and args.watch:
+        parser.error("--profile-startup can't be used with --watch, its workers are started ahead of time")
+    if args.cov is not None and coverage_support.coverage is None:
+        parser.error("--cov requires the coverage package: pip install 'para-pytest[cov]'")
+    try:
+        runner = ParaPytestRunner(
+            chunks=args.chunks,
+            pytest_args=[args.path],
+            debug=args.debug,
+            workers=args.workers,
+            schedule=args.schedule,
+            collect_workers=args.collect_workers,
+            rebalance=not args.no_rebalance,
+            adaptive=args.adaptive,
+            min_workers=args.min_workers,
+            io_workers=args.io_workers,
+            time_budget=args.time_budget,
+            precompile=args.precompile,
+            junitxml=args.junitxml,
+            metrics_file=args.metrics_file,
+            cov=args.cov is not None,
+            cov_sources=[source for source in args.cov or [] if source],
+            cov_reports=args.cov_report,
+            profile_startup=args.profile_startup,
+            profile=args.profile is not None,
+            profile_patterns=[pattern for pattern in args.profile or [] if pattern],
+            profile_output=args.profile_output,
+            profile_top=args.profile_top,
+            backend=args.backend,
+            plan=args.plan
+        )
+    except (OSError, ValueError) as error:
+        if not args.plan:
+            raise
+        parser.error(f"can't use plan {args.plan}: {error}")
+    sys.exit(runner.watch() if args.watch else runner.run())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+Share expensive session fixture values across para-pytest workers.
+
+The first worker to ask for a key computes the value while holding a file
+lock in the run's shared cache directory. Workers asking for the same key
+wait on the lock and reuse the stored result::
+
+    from para_pytest import shared_value
+
+    @pytest.fixture(scope="session")
+    def db_template():
+        return shared_value("db_template", build_db_template)
+
+Values must be picklable, e.g. a path, a serialized value or a template
+database name. Outside of para-pytest the factory is simply called.
+"""
+import hashlib
+import os
+import pickle
+from typing import Any, Callable
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+SHARED_DIR_ENV = 'PARA_PYTEST_SHARED_DIR'
+
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                # LK_LOCK gives up after 10 seconds, keep waiting for the first worker
+                continue
+
+
+def _unlock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def shared_value(key: str, factory: Callable[[], Any]) -> Any:
+    """Return the value for key, computing it with factory in only one worker of the run"""
+    directory = os.environ.get(SHARED_DIR_ENV)
+    if not directory:
+        return factory()
+
+    name = hashlib.sha1(key.encode()).hexdigest()
+    value_path = os.path.join(directory, f"{name}.pickle")
+
+    with open(f"{value_path}.lock", 'a+b') as lock:
+        _lock(lock)
+        try:
+            if os.path.exists(value_path):
+                with open(value_path, 'rb') as f:
+                    return pickle.load(f)
+
+            # A failing factory leaves no value behind, so the next worker retries
+            value = factory()
+
+            temp_path = f"{value_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                pickle.dump(value, f)
+            os.replace(temp_path, value_path)
+            return value
+        finally:
+            _unlock(lock)
@@ -0,0 +1,299 @@
+import asyncio
+import ctypes
+import ctypes.util
+import fnmatch
+import json
+import os
+import shutil
+import struct
+import sys
+from typing import Dict, List, Optional, Set
+
+
+# Directories never worth watching
+IGNORED_DIRS = {'.git', '.hg', '.svn', '__pycache__', '.pytest_cache', '.mypy_cache', '.ruff_cache',
+                '.tox', '.nox', '.venv', 'venv', 'node_modules', 'build', 'dist'}
+
+# Files whose change can affect every test
+CONFIG_FILES = {'conftest.py', 'pyproject.toml', 'pytest.ini', 'setup.cfg', 'tox.ini'}
+
+TEST_FILE_PATTERNS = ['test_*.py', '*_test.py']
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_watched_file(path: str) -> bool:
+    name = os.path.basename(path)
+    return name.endswith('.py') or name in CONFIG_FILES
+
+
+def is_test_file(path: str) -> bool:
+    name = os.path.basename(path)
+    return any(fnmatch.fnmatch(name, pattern) for pattern in TEST_FILE_PATTERNS)
+
+
+def walk_dirs(root: str):
+    """Directories under root, without hidden ones, virtualenvs and build output"""
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORED_DIRS and not d.startswith('.')]
+        yield dirpath
+
+
+def scan_mtimes(root: str) -> Dict[str, float]:
+    """Modification times of the Python and config files under root"""
+    mtimes = {}
+    for directory in walk_dirs(root):
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        for name in names:
+            path = os.path.normpath(os.path.join(directory, name))
+            if is_watched_file(path):
+                try:
+                    mtimes[path] = os.stat(path).st_mtime
+                except OSError:
+                    continue
+    return mtimes
+
+
+class Watcher:
+    """
+    Report changed Python and config files under root.
+
+    Uses inotify on Linux and falls back to polling modification times.
+    Changes are debounced: a batch is only returned once no new change
+    arrived for `debounce` seconds, so saving many files triggers one run.
+    """
+
+    def __init__(self, root: str = '.', debounce: float = 0.3, poll_interval: float = 0.5):
+        self.root = root
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.pending: Set[str] = set()
+        self.event = asyncio.Event()
+        self.fd = None
+        self.watches: Dict[int, str] = {}
+        self.mtimes: Dict[str, float] = {}
+        self.poll_task = None
+
+    @property
+    def backend(self) -> str:
+        return 'inotify' if self.fd is not None else 'polling'
+
+    def start(self):
+        libc = None
+        if sys.platform.startswith('linux'):
+            try:
+                libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            except OSError:
+                libc = None
+
+        if libc is not None and hasattr(libc, 'inotify_init1'):
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd >= 0:
+                self.libc = libc
+                self.fd = fd
+                for directory in walk_dirs(self.root):
+                    self._add_watch(directory)
+                asyncio.get_running_loop().add_reader(self.fd, self._read_events)
+                return
+
+        self.mtimes = self._scan()
+        self.poll_task = asyncio.ensure_future(self._poll())
+
+    def stop(self):
+        if self.fd is not None:
+            asyncio.get_running_loop().remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = None
+        if self.poll_task is not None:
+            self.poll_task.cancel()
+            self.poll_task = None
+
+    def _add_watch(self, directory: str):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd >= 0:
+            self.watches[wd] = directory
+
+    def _read_events(self):
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            path = os.path.normpath(os.path.join(directory, name))
+
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and name not in IGNORED_DIRS and not name.startswith('.'):
+                    for subdirectory in walk_dirs(path):
+                        self._add_watch(subdirectory)
+            elif is_watched_file(path):
+                self._changed(path)
+
+    def _scan(self) -> Dict[str, float]:
+        return scan_mtimes(self.root)
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            mtimes = self._scan()
+            for path in set(mtimes) | set(self.mtimes):
+                if mtimes.get(path) != self.mtimes.get(path):
+                    self._changed(path)
+            self.mtimes = mtimes
+
+    def _changed(self, path: str):
+        self.pending.add(path)
+        self.event.set()
+
+    async def changes(self) -> List[str]:
+        """Wait for the next debounced batch of changed files"""
+        while not self.pending:
+            self.event.clear()
+            await self.event.wait()
+
+        while True:
+            self.event.clear()
+            try:
+                await asyncio.wait_for(self.event.wait(), self.debounce)
+            except asyncio.TimeoutError:
+                break
+
+        changed = sorted(self.pending)
+        self.pending.clear()
+        return changed
+
+
+def pytest_interpreter() -> str:
+    """Interpreter the ``pytest`` command on PATH runs in, like cold workers, or this one"""
+    script = shutil.which('pytest')
+    if script:
+        try:
+            with open(script, 'rb') as f:
+                line = f.readline(1024)
+        except OSError:
+            line = b''
+        if line.startswith(b'#!'):
+            command = line[2:].decode('utf-8', 'replace').split()
+            if len(command) > 1 and os.path.basename(command[0]) == 'env':
+                command = [shutil.which(command[1]) or '']
+            if command and os.path.isfile(command[0]) and os.access(command[0], os.X_OK):
+                return command[0]
+    return sys.executable
+
+
+class WarmPool:
+    """
+    Worker interpreters started ahead of time, see para_pytest.worker.
+
+    Each process runs a single job. A replacement is started as soon as one
+    is handed out, so the next run finds warm workers again.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.python = pytest_interpreter()
+        self.idle: List[asyncio.subprocess.Process] = []
+        self.spawning: List[asyncio.Task] = []
+
+    async def _spawn(self) -> asyncio.subprocess.Process:
+        return await asyncio.create_subprocess_exec(
+            self.python, '-m', 'para_pytest.worker',
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT
+        )
+
+    async def fill(self):
+        """Start processes until the pool holds `size` of them"""
+        missing = self.size - len(self.idle) - len(self.spawning)
+        for _ in range(max(0, missing)):
+            task = asyncio.ensure_future(self._spawn())
+            self.spawning.append(task)
+            task.add_done_callback(self._spawned)
+
+    def _spawned(self, task: asyncio.Task):
+        self.spawning.remove(task)
+        if not task.cancelled() and task.exception() is None:
+            self.idle.append(task.result())
+
+    async def start(self, args: List[str], env: Dict[str, str]) -> asyncio.subprocess.Process:
+        """Hand a pytest job to a warm process, starting a cold one if none is ready"""
+        process = None
+        while self.idle:
+            candidate = self.idle.pop(0)
+            if candidate.returncode is None:
+                process = candidate
+                break
+        if process is None:
+            process = await self._spawn()
+
+        process.stdin.write((json.dumps({'args': args, 'env': env}) + '\n').encode())
+        await process.stdin.drain()
+        process.stdin.close()
+        await self.fill()
+        return process
+
+    async def close(self):
+        for task in self.spawning:
+            task.cancel()
+        for process in self.idle:
+            if process.returncode is None:
+                process.stdin.close()
+                await process.wait()
+        self.idle = []
+
+
+def affected_test_files(changed: List[str], known_test_files: List[str]) -> Optional[List[str]]:
+    """
+    Map changed files to the test files to re-run.
+
+    Test files map to themselves and source files to test files named after
+    them (`foo.py` -> `test_foo.py` / `foo_test.py`). Returns None when the
+    change can affect any test, e.g. a conftest.py or config file, or a source
+    file without a matching test file.
+    """
+    by_name: Dict[str, List[str]] = {}
+    for path in known_test_files:
+        by_name.setdefault(os.path.basename(path), []).append(path)
+
+    affected = []
+    for path in changed:
+        path = os.path.relpath(path)
+        name = os.path.basename(path)
+        if name in CONFIG_FILES:
+            return None
+        if is_test_file(path):
+            if os.path.exists(path):
+                affected.append(path)
+            continue
+
+        stem = name[:-len('.py')]
+        matches = by_name.get(f"test_{stem}.py", []) + by_name.get(f"{stem}_test.py", [])
+        if not matches:
+            return None
+        affected.extend(matches)
+
+    return list(dict.fromkeys(affected))
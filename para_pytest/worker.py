@@ -0,0 +1,35 @@
+"""
+Warm worker process used by watch mode.
+
+Started ahead of time with ``python -m para_pytest.worker``, by the interpreter
+of the ``pytest`` command, so the interpreter and pytest are already imported
+when a run needs a worker. Reads a single job
+from stdin, a JSON line with the pytest arguments and the environment to run
+them in, then exits like the ``pytest`` command.
+"""
+import json
+import os
+import sys
+
+# python -m puts the working directory first on sys.path, the pytest command doesn't
+if sys.path and os.path.abspath(sys.path[0] or os.curdir) == os.getcwd():
+    del sys.path[0]
+
+import pytest
+
+
+def main() -> int:
+    line = sys.stdin.readline()
+    if not line:
+        # Pool shut down before handing out a job
+        return 0
+
+    job = json.loads(line)
+    os.environ.clear()
+    os.environ.update(job['env'])
+    sys.argv = ['pytest'] + job['args']
+    return pytest.console_main()
+
+
+if __name__ == "__main__":
+    sys.exit(main())